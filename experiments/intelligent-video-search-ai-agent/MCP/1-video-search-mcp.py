@@ -3,15 +3,28 @@ import json
 import logging
 from mcp.server import FastMCP
 from typing import Optional, Dict, List, Any, Union
-from datetime import datetime
-from opensearchpy import OpenSearch, RequestsHttpConnection
+from dataclasses import dataclass, field, asdict
+from opensearchpy import OpenSearch, RequestsHttpConnection, SerializationError
+from opensearchpy.serializer import JSONSerializer
 from requests_aws4auth import AWS4Auth
 import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
 import numpy as np
+import orjson
 from dotenv import load_dotenv
 import asyncio
+import random
+import subprocess
+import threading
+import time
+from bisect import bisect_right
 from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from cachetools import TTLCache
 import base64
+import binascii
+import io
 import tempfile
 import uuid
 from pathlib import Path
@@ -43,8 +56,65 @@ INDEX_NAME = os.getenv("INDEX_NAME", "video-insights-rag")
 TWELVE_LABS_API_KEY_SECRET = os.getenv('TWELVE_LABS_API_KEY_SECRET')
 MARENGO_MODEL_ID = os.getenv('MARENGO_MODEL_ID', 'marengo2.7')
 
+# Cohere embedding request body with the constant fields pre-serialized; only
+# the (JSON-encoded) text and input_type are spliced in per request. Cohere returns
+# int8 embeddings (~1KB of values instead of ~20KB of float text), which query
+# the byte-vector pegasus_insights_embedding field as-is.
+_EMBED_TEMPLATE = b'{"texts":[%s],"input_type":%s,"embedding_types":["int8"]}'
+
+# Embedding retry configuration (exponential backoff with jitter)
+EMBEDDING_MAX_ATTEMPTS = int(os.getenv('EMBEDDING_MAX_ATTEMPTS', '4'))
+
+# Query embedding cache: agents often repeat the same query
+EMBEDDING_CACHE_SIZE = int(os.getenv('EMBEDDING_CACHE_SIZE', '4096'))
+EMBEDDING_CACHE_TTL = int(os.getenv('EMBEDDING_CACHE_TTL', '3600'))
+
+# _source field lists, built once at import (tuples serialize as JSON arrays)
+_SEARCH_SOURCE_FIELDS = ("video_id", "video_title", "s3_bucket", "s3_key", "thumbnail_s3_key",
+                         "pegasus_insights.summary", "processing_timestamp", "detections.entities")
+# Listing fields only: no summary or entity arrays (fetch those with get_video_details)
+_LIGHT_SOURCE_FIELDS = ("video_id", "video_title", "s3_bucket", "s3_key", "thumbnail_s3_key",
+                        "processing_timestamp")
+# Result lists never need vectors; exclude them even if an include pattern widens
+_SEARCH_SOURCE = {"includes": _SEARCH_SOURCE_FIELDS, "excludes": ("*_embedding",)}
+_LIGHT_SOURCE = {"includes": _LIGHT_SOURCE_FIELDS, "excludes": ("*_embedding",)}
+_DETAILS_SOURCE_FIELDS = ("video_id", "video_title", "s3_bucket", "s3_key", "pegasus_insights.summary",
+                          "pegasus_insights.topics", "pegasus_insights.hashtags", "detections.entities")
+_SUMMARY_SOURCE_FIELDS = ("video_id", "video_title", "pegasus_insights.summary", "pegasus_insights.topics",
+                          "pegasus_insights.hashtags", "detections.entities")
+_SENTIMENT_SOURCE_FIELDS = ("video_id", "video_title", "pegasus_insights.sentiment_analysis")
+_TRANSCRIPT_SOURCE_FIELDS = ("video_id", "video_title", "pegasus_insights.transcription")
+_PERSON_SOURCE_FIELDS = ("video_id", "video_title", "detections.entities.person_names")
+# Reference lookups for similarity search add the embedding field in use
+_REFERENCE_SOURCE_FIELDS = ("video_id", "video_title", "pegasus_insights.summary")
+# search_videos_hybrid: free-text fields (title boosted) and exact-phrase keyword fields
+_HYBRID_QUERY_FIELDS = ("video_title^3", "pegasus_insights.summary^2", "pegasus_insights.topics",
+                        "pegasus_content_for_embedding")
+_HYBRID_KEYWORD_FIELDS = ("detections.entities.brands^2", "detections.entities.companies^2",
+                          "detections.entities.person_names^2", "video_title", "pegasus_insights.summary")
+_HYBRID_NORMALIZATION = {"technique": "min_max"}
+_DEFAULT_KEYWORD_SEARCH_FIELDS = ("video_title", "pegasus_insights.summary", "pegasus_insights.topics",
+                                  "detections.entities.brands", "detections.entities.companies",
+                                  "detections.entities.person_names")
+
 # Search Configuration
+TRANSCRIPT_TEXT_FIELD = "pegasus_insights.transcription.full_text"
+# kNN candidate pool: k sets how many neighbours HNSW collects per query.
+# A k equal to the page size (often 10) hurts recall; a very large k makes
+# the graph walk slow. Use a bounded pool and let "size" trim the results.
+DEFAULT_K_NUM_CANDIDATES = int(os.getenv('DEFAULT_K_NUM_CANDIDATES', '50'))
+MAX_K_NUM_CANDIDATES = 200
+# video_content_embedding is stored 1-bit quantized on disk; oversample the
+# binary candidates and rescore them with full-precision vectors
+VISUAL_EMBEDDING_FIELD = "video_content_embedding"
+VISUAL_OVERSAMPLE_FACTOR = float(os.getenv('VISUAL_OVERSAMPLE_FACTOR', '4.0'))
+# Seconds between kNN graph re-warms (0 disables the periodic warmup)
+KNN_WARMUP_INTERVAL = int(os.getenv('KNN_WARMUP_INTERVAL', '900'))
+# find_similar_videos MMR re-ranking considers this many candidates per result
+MMR_FETCH_MULTIPLIER = 3
 DEFAULT_SIMILARITY_THRESHOLD = float(os.getenv('DEFAULT_SIMILARITY_THRESHOLD', '0.8'))
+# Shard routing preference for searches ("_local" improves shard cache hits; set empty to disable)
+SEARCH_PREFERENCE = os.getenv('SEARCH_PREFERENCE', '_local') or None
 
 def get_twelve_labs_index_id() -> str:
     """Retrieve Twelve Labs index ID from AWS Secrets Manager"""
@@ -95,6 +165,31 @@ awsauth = AWS4Auth(
     session_token=credentials.token
 )
 
+# Cap concurrent OpenSearch / Bedrock requests so bursts of tool calls queue
+# here instead of opening a storm of connections; the OpenSearch connection
+# pool is sized to match
+BACKEND_MAX_CONCURRENCY = int(os.getenv('BACKEND_MAX_CONCURRENCY', '16'))
+_request_slots = threading.BoundedSemaphore(BACKEND_MAX_CONCURRENCY)
+
+class OrjsonSerializer(JSONSerializer):
+    """OpenSearch serializer backed by orjson; embeddings may be passed as NumPy arrays"""
+    
+    def loads(self, s):
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError as e:
+            raise SerializationError(s, e)
+    
+    def dumps(self, data):
+        # don't serialize strings
+        if isinstance(data, str):
+            return data
+        try:
+            # str, not bytes: _msearch joins the serialized lines with "\n"
+            return orjson.dumps(data, default=self.default, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+        except (TypeError, orjson.JSONEncodeError) as e:
+            raise SerializationError(data, e)
+
 # Initialize OpenSearch client (synchronous version for FastMCP)
 opensearch_client = OpenSearch(
     hosts=[{'host': OPENSEARCH_ENDPOINT, 'port': 443}],
@@ -102,11 +197,67 @@ opensearch_client = OpenSearch(
     use_ssl=True,
     verify_certs=True,
     connection_class=RequestsHttpConnection,
+    serializer=OrjsonSerializer(),
+    pool_maxsize=BACKEND_MAX_CONCURRENCY,
+    http_compress=True,  # gzip request and response bodies
     timeout=300
 )
 
-# Thread pool for async operations
-executor = ThreadPoolExecutor(max_workers=5)
+# Shared S3 client (boto3 clients are thread-safe); reusing it keeps the
+# connection pool and TLS sessions warm across presigning and uploads
+s3_client = boto3.client(
+    's3',
+    config=Config(max_pool_connections=32, retries={'max_attempts': 3, 'mode': 'adaptive'})
+)
+
+# Shared Bedrock Runtime client for Cohere query embeddings; one pool sized
+# for the backend concurrency keeps connections warm across queries
+bedrock_client = boto3.client(
+    'bedrock-runtime',
+    region_name=AWS_REGION,
+    config=Config(max_pool_connections=BACKEND_MAX_CONCURRENCY, retries={'max_attempts': 3, 'mode': 'adaptive'})
+)
+
+# Thread pool for async operations. boto3/Bedrock/OpenSearch calls are I/O-bound
+# (threads mostly wait on the network), so size the pool well above the CPU count;
+# override with MCP_EXECUTOR_WORKERS to match the expected concurrency.
+MCP_EXECUTOR_WORKERS = int(os.getenv("MCP_EXECUTOR_WORKERS", str(min(32, (os.cpu_count() or 1) * 4))))
+executor = ThreadPoolExecutor(max_workers=MCP_EXECUTOR_WORKERS, thread_name_prefix="mcp-io")
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking SDK call on the shared I/O thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+
+# Twelve Labs task polling backoff for search_by_video_upload (seconds)
+UPLOAD_POLL_INITIAL_DELAY = 2
+UPLOAD_POLL_MAX_DELAY = 30
+# Upload thumbnails: frame offset and output width
+THUMBNAIL_OFFSET_SECONDS = 2
+THUMBNAIL_WIDTH = 320
+# Base64 characters decoded per step when spooling uploads to disk (multiple of 4)
+BASE64_DECODE_CHUNK_SIZE = 256 * 1024
+
+# Presigned URL cache: (bucket, key) -> url. URLs are signed for 1 hour and
+# cached for 50 minutes so a cached URL always has at least 10 minutes left.
+PRESIGNED_URL_EXPIRY = 3600
+_url_cache = TTLCache(maxsize=10_000, ttl=3000)
+_url_lock = threading.Lock()
+
+# Short-lived cache for tool responses that agents poll repeatedly
+# (check_opensearch_status, get_all_videos); bypass with refresh=True
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", "30"))
+_result_cache = TTLCache(maxsize=64, ttl=RESULT_CACHE_TTL)
+_result_lock = threading.Lock()
+
+_embedding_cache = TTLCache(maxsize=EMBEDDING_CACHE_SIZE, ttl=EMBEDDING_CACHE_TTL)
+_embedding_lock = threading.Lock()
+
+# Reference video lookups for similarity search: (video_id, embedding field) ->
+# _source with that embedding. Stored embeddings only change on re-ingestion.
+REFERENCE_CACHE_SIZE = int(os.getenv('REFERENCE_CACHE_SIZE', '2048'))
+_reference_cache = TTLCache(maxsize=REFERENCE_CACHE_SIZE, ttl=EMBEDDING_CACHE_TTL)
+_reference_lock = threading.Lock()
 
 # Lazy load Twelve Labs to avoid import errors if not needed
 _twelve_labs_client = None
@@ -149,6 +300,21 @@ def get_twelve_labs_client():
     return _twelve_labs_client
 
 # Helper Functions
+def _get_or_sign(bucket: str, key: str) -> str:
+    """Return a cached presigned GET URL for an S3 object, signing on cache miss"""
+    cache_key = (bucket, key)
+    with _url_lock:
+        url = _url_cache.get(cache_key)
+    if url is None:
+        url = s3_client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': bucket, 'Key': key},
+            ExpiresIn=PRESIGNED_URL_EXPIRY
+        )
+        with _url_lock:
+            _url_cache[cache_key] = url
+    return url
+
 def prepare_content_for_embedding(video_data: Dict[str, Any]) -> str:
     """
     Prepare content for Cohere embedding from video data.
@@ -210,81 +376,341 @@ def prepare_content_for_embedding(video_data: Dict[str, Any]) -> str:
     
     return "\n\n".join(content_parts)
 
-def format_video_result(hit: Dict[str, Any]) -> Dict[str, Any]:
+@dataclass(slots=True)
+class VideoResult:
+    """Search result record for a single video (converted with asdict() at the response boundary)"""
+    video_id: Optional[str]
+    video_title: str
+    video_url: Optional[str]
+    thumbnail_s3_key: Optional[str]
+    summary: Optional[str]
+    score: float
+    processing_date: Optional[str]
+    brands_mentioned: List[str] = field(default_factory=list)
+    companies_mentioned: List[str] = field(default_factory=list)
+    people_mentioned: List[str] = field(default_factory=list)
+
+def format_video_result(hit: Dict[str, Any]) -> VideoResult:
     """Format OpenSearch hit into a clean video result"""
     source = hit["_source"]
+    entities = source.get("detections", {}).get("entities", {}) or {}
     
     # Generate presigned URL on-demand if S3 info is available
     video_url = None
     if source.get("s3_bucket") and source.get("s3_key"):
         try:
-            s3_client = boto3.client('s3')
-            video_url = s3_client.generate_presigned_url(
-                'get_object',
-                Params={'Bucket': source["s3_bucket"], 'Key': source["s3_key"]},
-                ExpiresIn=3600  # 1 hour for viewing
-            )
+            video_url = _get_or_sign(source["s3_bucket"], source["s3_key"])
+        except Exception as e:
+            logger.warning(f"Could not generate presigned URL for video {source.get('video_id')}: {e}")
+    
+    return VideoResult(
+        video_id=source.get("video_id"),
+        video_title=source.get("video_title", "Untitled"),
+        video_url=video_url,
+        thumbnail_s3_key=source.get("thumbnail_s3_key"),
+        # None when the summary was not requested (light listings)
+        summary=(source["pegasus_insights"].get("summary", "No summary available")
+                 if "pegasus_insights" in source else None),
+        score=hit.get("_score", 0),
+        processing_date=source.get("processing_timestamp"),
+        brands_mentioned=entities.get("brands", []),
+        companies_mentioned=entities.get("companies", []),
+        people_mentioned=entities.get("person_names", [])
+    )
+
+def get_embedding_from_text(text: str, input_type: str = "search_query") -> np.ndarray:
+    """
+    Generate an int8 embedding from text using Cohere via Amazon Bedrock.
+    
+    Transient Bedrock errors are retried with exponential backoff and jitter;
+    the last error is raised once all attempts are exhausted.
+    """
+    # Get Cohere model ID from environment
+    cohere_model_id = os.getenv('COHERE_MODEL_ID', 'cohere.embed-english-v3')
+    
+    # Cohere has a limit on text length, truncate if needed
+    # Maximum is typically 512 tokens, roughly 2048 characters
+    truncated_text = text[:2048] if len(text) > 2048 else text
+    
+    # Prepare request body for Cohere embedding
+    body = _EMBED_TEMPLATE % (orjson.dumps(truncated_text), orjson.dumps(input_type))
+    
+    for attempt in range(EMBEDDING_MAX_ATTEMPTS):
+        try:
+            # Invoke Cohere model via Bedrock
+            with _request_slots:
+                response = bedrock_client.invoke_model(
+                    body=body,
+                    modelId=cohere_model_id,
+                    accept='*/*',
+                    contentType='application/json'
+                )
+            break
+        except (ClientError, BotoCoreError) as e:
+            if attempt == EMBEDDING_MAX_ATTEMPTS - 1:
+                logger.error(f"Error generating Cohere embeddings after {EMBEDDING_MAX_ATTEMPTS} attempts: {e}")
+                raise
+            delay = min(2 ** attempt, 8) * (0.5 + random.random() * 0.5)
+            logger.warning(f"Cohere embedding attempt {attempt + 1} failed, retrying in {delay:.2f}s: {e}")
+            time.sleep(delay)
+    
+    # Parse response
+    response_body = orjson.loads(response.get('body').read())
+    embeddings = response_body.get('embeddings', {}).get('int8', [])
+    
+    if embeddings and len(embeddings) > 0:
+        # Keep the first (and only) embedding as a compact, read-only int8 array;
+        # it is cached and shared between requests
+        embedding = np.asarray(embeddings[0], dtype=np.int8)
+        embedding.flags.writeable = False
+        return embedding
+    else:
+        raise ValueError("No embeddings returned from Cohere")
+
+def knn_candidate_pool(size: int) -> int:
+    """Return the kNN k for a search returning size hits"""
+    return min(max(size * 4, DEFAULT_K_NUM_CANDIDATES), MAX_K_NUM_CANDIDATES)
+
+def search_index(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a search against INDEX_NAME, bounded by the shared request semaphore"""
+    with _request_slots:
+        return opensearch_client.search(index=INDEX_NAME, body=body, preference=SEARCH_PREFERENCE)
+
+def msearch_index(body: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Run a multi-search against INDEX_NAME, bounded by the shared request semaphore"""
+    # _msearch takes the routing preference per search, on each header line
+    if SEARCH_PREFERENCE:
+        body = [
+            {**line, "preference": SEARCH_PREFERENCE} if i % 2 == 0 else line
+            for i, line in enumerate(body)
+        ]
+    with _request_slots:
+        return opensearch_client.msearch(body=body, index=INDEX_NAME)
+
+def knn_query(field_name: str, vector: Union[List[float], np.ndarray], size: int) -> Dict[str, Any]:
+    """Build the kNN query clause for field_name returning size hits"""
+    clause = {"vector": vector, "k": knn_candidate_pool(size)}
+    if field_name == VISUAL_EMBEDDING_FIELD:
+        clause["rescore"] = {"oversample_factor": VISUAL_OVERSAMPLE_FACTOR}
+    return {"knn": {field_name: clause}}
+
+def mmr_select(
+    query_vector: Union[List[float], np.ndarray],
+    candidate_vectors: List[List[float]],
+    k: int,
+    mmr_lambda: float
+) -> List[int]:
+    """
+    Pick k candidates by Maximal Marginal Relevance.
+    
+    Each step takes the argmax of lambda * sim(query, d) - (1 - lambda) * max sim(d, selected),
+    with cosine similarity on unit-normalized vectors.
+    
+    Returns:
+        Indices into candidate_vectors, in selection order
+    """
+    if not candidate_vectors:
+        return []
+    candidates = np.asarray(candidate_vectors, dtype=np.float32)
+    candidates /= np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_vector, dtype=np.float32)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+    
+    relevance = candidates @ query
+    # Running max similarity of every candidate to the selected set
+    redundancy = np.full(len(candidates), -np.inf, dtype=np.float32)
+    available = np.ones(len(candidates), dtype=bool)
+    selected = []
+    for _ in range(min(k, len(candidates))):
+        if selected:
+            scores = mmr_lambda * relevance - (1 - mmr_lambda) * redundancy
+        else:
+            scores = relevance.copy()
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, candidates @ candidates[best])
+    return selected
+
+def find_mention_timestamps(segments: List[Dict[str, Any]], name: str) -> List[tuple]:
+    """
+    Return (start_time, character_position) for each mention of name in the
+    transcript segments (one segment per spoken word), in transcript order.
+    
+    The segments are joined into one text, so names spanning several words
+    match; each match takes the start time of the segment holding its first
+    character.
+    
+    >>> words = [{"text": t, "start_time": s} for t, s in
+    ...          [("Hi", 0.0), ("John", 0.4), ("Smith", 0.7), ("bye", 1.2)]]
+    >>> find_mention_timestamps(words, "john  smith")
+    [(0.4, 3)]
+    """
+    name = " ".join(name.split()).lower()
+    if not name:
+        return []
+    # Character offset where each segment starts in the joined text
+    starts = []
+    offset = 0
+    for segment in segments:
+        starts.append(offset)
+        offset += len(segment.get("text", "")) + 1  # +1 for the joining space
+    joined = " ".join(segment.get("text", "") for segment in segments).lower()
+    
+    occurrences = []
+    idx = joined.find(name)
+    while idx != -1:
+        segment = segments[bisect_right(starts, idx) - 1]
+        occurrences.append((segment.get("start_time"), idx))
+        idx = joined.find(name, idx + 1)
+    return occurrences
+
+def _exclude_reference(query: Dict[str, Any], video_id: str) -> Dict[str, Any]:
+    """Wrap a query so the reference video itself is filtered out server-side"""
+    return {"bool": {"must": [query], "must_not": [{"term": {"video_id": video_id}}]}}
+
+def get_cached_embedding(text: str, input_type: str = "search_query") -> np.ndarray:
+    """
+    Return the query embedding for text, calling Cohere only on a cache miss.
+    
+    The cache key ignores case and surrounding/repeated whitespace.
+    """
+    cache_key = (" ".join(text.split()).lower(), input_type)
+    with _embedding_lock:
+        embedding = _embedding_cache.get(cache_key)
+    if embedding is None:
+        embedding = get_embedding_from_text(text, input_type)
+        with _embedding_lock:
+            _embedding_cache[cache_key] = embedding
+    return embedding
+
+def quantize_embedding(embedding: Union[List[float], np.ndarray]) -> np.ndarray:
+    """
+    Linearly quantize a float embedding (L2-normalized first) to int8 values so it
+    can query the byte-vector pegasus_insights_embedding field
+    """
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector = vector / norm
+    return np.clip(np.round(vector * 127), -128, 127).astype(np.int8)
+
+def dequantize_embedding(embedding: Union[List[int], np.ndarray]) -> np.ndarray:
+    """Map an int8 embedding back to floats for querying float kNN fields"""
+    return np.asarray(embedding, dtype=np.float32) / 127.0
+
+def ensure_index_mapping() -> bool:
+    """
+    Check that the visual kNN field uses on-disk binary quantization.
+    
+    kNN field methods cannot be changed on an existing index, so an index created
+    with an older mapping is only reported here; it has to be re-created with
+    data_ingestion/1-create-opensearch-index.py and the videos re-ingested.
+    
+    Returns:
+        True if the mapping matches, False otherwise
+    """
+    try:
+        mapping = opensearch_client.indices.get_mapping(index=INDEX_NAME)
+    except Exception as e:
+        logger.warning(f"Could not read mapping for index {INDEX_NAME}: {e}")
+        return False
+    
+    properties = mapping.get(INDEX_NAME, {}).get("mappings", {}).get("properties", {})
+    visual = properties.get(VISUAL_EMBEDDING_FIELD, {})
+    if visual.get("mode") == "on_disk" and visual.get("compression_level") == "32x":
+        return True
+    
+    logger.warning(
+        f"Index {INDEX_NAME} does not store {VISUAL_EMBEDDING_FIELD} with on-disk 32x "
+        "binary quantization; re-create it with data_ingestion/1-create-opensearch-index.py "
+        "and re-ingest videos to shrink kNN vector memory"
+    )
+    return False
+
+def warmup_knn_index(reschedule: bool = False) -> bool:
+    """
+    Load the index's HNSW graphs into native memory so the first kNN queries
+    don't pay the lazy-load cost.
+    
+    Args:
+        reschedule: Run again every KNN_WARMUP_INTERVAL seconds (graphs can be
+            evicted under memory pressure or after segment merges)
+    
+    Returns:
+        True if the warmup request succeeded
+    """
+    try:
+        opensearch_client.transport.perform_request("GET", f"/_plugins/_knn/warmup/{INDEX_NAME}")
+        warmed = True
+    except Exception as e:
+        # OpenSearch Serverless manages graph loading itself and may reject the API
+        logger.warning(f"kNN warmup for index {INDEX_NAME} failed: {e}")
+        warmed = False
+    
+    if reschedule and KNN_WARMUP_INTERVAL > 0:
+        timer = threading.Timer(KNN_WARMUP_INTERVAL, warmup_knn_index, kwargs={"reschedule": True})
+        timer.daemon = True
+        timer.start()
+    return warmed
+
+def _video_details_source_fields(
+    include_transcript: bool,
+    include_chapters: bool,
+    include_content_analytics: bool
+) -> List[str]:
+    """Build the _source field list needed for a video details response"""
+    source_fields = list(_DETAILS_SOURCE_FIELDS)
+    if include_chapters:
+        source_fields.append("pegasus_insights.chapters")
+    if include_content_analytics:
+        source_fields += ["pegasus_insights.content_analytics", "pegasus_insights.sentiment_analysis"]
+    if include_transcript:
+        source_fields.append("pegasus_insights.transcription.full_text")
+    return source_fields
+
+def _build_video_details(
+    source: Dict[str, Any],
+    include_transcript: bool,
+    include_chapters: bool,
+    include_content_analytics: bool
+) -> Dict[str, Any]:
+    """Format an OpenSearch document _source into a video details dictionary"""
+    # Generate presigned URL on-demand if S3 info is available
+    video_url = None
+    if source.get("s3_bucket") and source.get("s3_key"):
+        try:
+            video_url = _get_or_sign(source["s3_bucket"], source["s3_key"])
         except Exception as e:
             logger.warning(f"Could not generate presigned URL for video {source.get('video_id')}: {e}")
     
-    result = {
+    insights = source.get("pegasus_insights", {})
+    entities = source.get("detections", {}).get("entities", {}) or {}
+    
+    video = {
         "video_id": source.get("video_id"),
         "video_title": source.get("video_title", "Untitled"),
         "video_url": video_url,
-        "thumbnail_s3_key": source.get("thumbnail_s3_key"),
-        "summary": source.get("pegasus_insights", {}).get("summary", "No summary available"),
-        "score": hit.get("_score", 0),
-        "processing_date": source.get("processing_timestamp"),
-        "brands_mentioned": source.get("detections", {}).get("entities", {}).get("brands", []),
-        "companies_mentioned": source.get("detections", {}).get("entities", {}).get("companies", []),
-        "people_mentioned": source.get("detections", {}).get("entities", {}).get("person_names", [])
+        "summary": insights.get("summary"),
+        "topics": insights.get("topics"),
+        "hashtags": insights.get("hashtags"),
+        "brands": entities.get("brands", []),
+        "companies": entities.get("companies", []),
+        "people": entities.get("person_names", [])
     }
-    return result
-
-def get_embedding_from_text(text: str) -> List[float]:
-    """Generate embedding from text using Cohere via Amazon Bedrock"""
-    try:
-        # Get Cohere model ID from environment
-        cohere_model_id = os.getenv('COHERE_MODEL_ID', 'cohere.embed-english-v3')
-        region = os.getenv('AWS_REGION', 'us-east-1')
-        
-        # Initialize Bedrock client
-        bedrock = boto3.client(service_name='bedrock-runtime', region_name=region)
-        
-        # Cohere has a limit on text length, truncate if needed
-        # Maximum is typically 512 tokens, roughly 2048 characters
-        truncated_text = text[:2048] if len(text) > 2048 else text
-        
-        # Prepare request body for Cohere embedding
-        body = json.dumps({
-            "texts": [truncated_text],
-            "input_type": "search_query",  # For search queries
-            "embedding_types": ["float"]
-        })
-        
-        # Invoke Cohere model via Bedrock
-        response = bedrock.invoke_model(
-            body=body,
-            modelId=cohere_model_id,
-            accept='*/*',
-            contentType='application/json'
-        )
-        
-        # Parse response
-        response_body = json.loads(response.get('body').read())
-        embeddings = response_body.get('embeddings', {}).get('float', [])
-        
-        if embeddings and len(embeddings) > 0:
-            return embeddings[0]  # Return the first (and only) embedding
-        else:
-            raise ValueError("No embeddings returned from Cohere")
-            
-    except Exception as e:
-        logger.error(f"Error generating Cohere embeddings: {e}")
-        # Return a dummy embedding in case of error to avoid breaking the search
-        import random
-        random.seed(hash(text) % 1000)
-        return [random.random() for _ in range(1024)]
+    
+    if include_chapters:
+        video["chapters"] = insights.get("chapters", [])
+    
+    if include_content_analytics:
+        video["content_analytics"] = insights.get("content_analytics")
+        video["sentiment"] = insights.get("sentiment_analysis")
+    
+    if include_transcript:
+        video["transcript"] = insights.get("transcription", {}).get("full_text")
+    
+    return video
 
 # MCP Tool Implementations
 @mcp.tool(description="Search for videos containing specific keywords in titles, summaries, brands, companies, or people names")
@@ -305,35 +731,31 @@ def search_videos_by_keywords(
         Dictionary with search results
     """
     if search_fields is None:
-        search_fields = [
-            "video_title", "pegasus_insights.summary", "pegasus_insights.topics", 
-            "detections.entities.brands", "detections.entities.companies", 
-            "detections.entities.person_names"
-        ]
+        search_fields = _DEFAULT_KEYWORD_SEARCH_FIELDS
     
     should_clauses = []
     
     for keyword in keywords:
-        for field in search_fields:
+        for search_field in search_fields:
             should_clauses.append({
-                "match": {field: {"query": keyword, "boost": 1.0}}
+                "match": {search_field: {"query": keyword, "boost": 1.0}}
             })
     
     query = {
         "size": max_results,
+        "track_total_hits": 100,  # Bounded count; exact totals beyond 100 are not needed
         "query": {
             "bool": {
                 "should": should_clauses,
                 "minimum_should_match": 1
             }
         },
-        "_source": ["video_id", "video_title", "s3_bucket", "s3_key", "thumbnail_s3_key", "pegasus_insights.summary", 
-                   "processing_timestamp", "detections.entities"]
+        "_source": _SEARCH_SOURCE
     }
     
     try:
-        response = opensearch_client.search(index=INDEX_NAME, body=query)
-        results = [format_video_result(hit) for hit in response["hits"]["hits"]]
+        response = search_index(query)
+        results = [asdict(format_video_result(hit)) for hit in response["hits"]["hits"]]
         
         return {
             "success": True,
@@ -367,27 +789,36 @@ def search_videos_by_semantic_query(
         Dictionary with search results
     """
     # Generate embedding for the query
-    query_embedding = get_embedding_from_text(query)
+    try:
+        query_embedding = get_cached_embedding(query)
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Semantic search failed: could not generate query embedding: {str(e)}",
+            "results": []
+        }
     
     embedding_field = "pegasus_insights_embedding" if use_pegasus_embedding else "video_content_embedding"
+    # Query embeddings are int8, matching the byte-vector Pegasus insights field
+    query_vector = query_embedding if use_pegasus_embedding else dequantize_embedding(query_embedding)
     
     search_query = {
         "size": max_results,
-        "query": {
-            "knn": {
-                embedding_field: {
-                    "vector": query_embedding,
-                    "k": max_results
-                }
-            }
-        },
-        "_source": ["video_id", "video_title", "s3_bucket", "s3_key", "thumbnail_s3_key", "pegasus_insights.summary", 
-                   "processing_timestamp", "detections.entities", "pegasus_content_for_embedding"]
+        "track_total_hits": False,  # Top-K only, skip the global hit count
+        "query": knn_query(embedding_field, query_vector, max_results),
+        "_source": _SEARCH_SOURCE
     }
     
+    # The embedded content is only needed for debug logging below
+    if logger.isEnabledFor(logging.DEBUG):
+        search_query["_source"] = {
+            "includes": _SEARCH_SOURCE_FIELDS + ("pegasus_content_for_embedding",),
+            "excludes": _SEARCH_SOURCE["excludes"]
+        }
+    
     try:
-        response = opensearch_client.search(index=INDEX_NAME, body=search_query)
-        results = [format_video_result(hit) for hit in response["hits"]["hits"]]
+        response = search_index(search_query)
+        results = [asdict(format_video_result(hit)) for hit in response["hits"]["hits"]]
         
         # Log the embedded content that was used for search (helpful for debugging)
         if results and logger.isEnabledFor(logging.DEBUG):
@@ -430,11 +861,12 @@ def get_video_details(
         Dictionary with video details
     """
     query = {
-        "query": {"term": {"video_id": video_id}}
+        "query": {"term": {"video_id": video_id}},
+        "_source": _video_details_source_fields(include_transcript, include_chapters, include_content_analytics)
     }
     
     try:
-        response = opensearch_client.search(index=INDEX_NAME, body=query)
+        response = search_index(query)
         
         if response["hits"]["total"]["value"] == 0:
             return {
@@ -445,51 +877,90 @@ def get_video_details(
         
         source = response["hits"]["hits"][0]["_source"]
         
-        # Generate presigned URL on-demand if S3 info is available
-        video_url = None
-        if source.get("s3_bucket") and source.get("s3_key"):
-            try:
-                s3_client = boto3.client('s3')
-                video_url = s3_client.generate_presigned_url(
-                    'get_object',
-                    Params={'Bucket': source["s3_bucket"], 'Key': source["s3_key"]},
-                    ExpiresIn=3600  # 1 hour for viewing
-                )
-            except Exception as e:
-                logger.warning(f"Could not generate presigned URL for video {source.get('video_id')}: {e}")
-
-        result = {
+        return {
             "success": True,
-            "video": {
-                "video_id": source.get("video_id"),
-                "video_title": source.get("video_title", "Untitled"),
-                "video_url": video_url,
-                "summary": source.get("pegasus_insights", {}).get("summary"),
-                "topics": source.get("pegasus_insights", {}).get("topics"),
-                "hashtags": source.get("pegasus_insights", {}).get("hashtags"),
-                "brands": source.get("detections", {}).get("entities", {}).get("brands", []),
-                "companies": source.get("detections", {}).get("entities", {}).get("companies", []),
-                "people": source.get("detections", {}).get("entities", {}).get("person_names", [])
-            }
+            "video": _build_video_details(source, include_transcript, include_chapters, include_content_analytics)
         }
         
-        if include_chapters:
-            result["video"]["chapters"] = source.get("pegasus_insights", {}).get("chapters", [])
-        
-        if include_content_analytics:
-            result["video"]["content_analytics"] = source.get("pegasus_insights", {}).get("content_analytics")
-            result["video"]["sentiment"] = source.get("pegasus_insights", {}).get("sentiment_analysis")
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to get video details: {str(e)}",
+            "video": None
+        }
+
+@mcp.tool(description="Get detailed information about several videos in a single request")
+def get_videos_details_batch(
+    video_ids: List[str],
+    include_transcript: bool = False,
+    include_chapters: bool = True,
+    include_content_analytics: bool = True
+) -> Dict[str, Any]:
+    """
+    Get detailed information about multiple videos using one multi-search round-trip.
+    
+    Args:
+        video_ids: The video IDs to look up
+        include_transcript: Include full transcript (default: False)
+        include_chapters: Include chapter information (default: True)
+        include_content_analytics: Include content analytics and insights (default: True)
+    
+    Returns:
+        Dictionary with video details keyed by video ID
+    """
+    if not video_ids:
+        return {
+            "success": False,
+            "error": "No video IDs provided",
+            "videos": {}
+        }
+    
+    source_fields = _video_details_source_fields(include_transcript, include_chapters, include_content_analytics)
+    
+    # _msearch body alternates header and query lines, one pair per video
+    body = []
+    for video_id in video_ids:
+        body.append({"index": INDEX_NAME})
+        body.append({
+            "size": 1,
+            "query": {"term": {"video_id": video_id}},
+            "_source": source_fields
+        })
+    
+    try:
+        response = msearch_index(body)
+        
+        videos = {}
+        not_found = []
+        errors = {}
+        for video_id, item in zip(video_ids, response["responses"]):
+            if "error" in item:
+                errors[video_id] = str(item["error"])
+                continue
+            hits = item["hits"]["hits"]
+            if not hits:
+                not_found.append(video_id)
+                continue
+            videos[video_id] = _build_video_details(
+                hits[0]["_source"], include_transcript, include_chapters, include_content_analytics
+            )
         
-        if include_transcript:
-            result["video"]["transcript"] = source.get("pegasus_insights", {}).get("transcription", {}).get("full_text")
+        result = {
+            "success": True,
+            "videos": videos,
+            "found": len(videos),
+            "not_found": not_found
+        }
+        if errors:
+            result["errors"] = errors
         
         return result
         
     except Exception as e:
         return {
             "success": False,
-            "error": f"Failed to get video details: {str(e)}",
-            "video": None
+            "error": f"Failed to get video details batch: {str(e)}",
+            "videos": {}
         }
 
 @mcp.tool(description="Find when and where a specific person is mentioned in a video")
@@ -509,12 +980,33 @@ def search_person_in_video(
     Returns:
         Dictionary with person mentions and timestamps
     """
+    source_fields = list(_PERSON_SOURCE_FIELDS)
     query = {
-        "query": {"term": {"video_id": video_id}}
+        "query": {"term": {"video_id": video_id}},
+        "_source": source_fields
     }
     
+    if include_context:
+        # Let OpenSearch find the phrase and cut ~200 character context windows
+        # server-side instead of shipping the full transcript to scan here.
+        # Only the (small) segments are fetched, to resolve timestamps.
+        source_fields.append("pegasus_insights.transcription.segments")
+        query["highlight"] = {
+            "highlight_query": {
+                "match_phrase": {TRANSCRIPT_TEXT_FIELD: person_name}
+            },
+            "fields": {
+                TRANSCRIPT_TEXT_FIELD: {
+                    "pre_tags": [""],
+                    "post_tags": [""],
+                    "fragment_size": 200,
+                    "number_of_fragments": 100
+                }
+            }
+        }
+    
     try:
-        response = opensearch_client.search(index=INDEX_NAME, body=query)
+        response = search_index(query)
         
         if response["hits"]["total"]["value"] == 0:
             return {
@@ -523,7 +1015,8 @@ def search_person_in_video(
                 "mentions": []
             }
         
-        source = response["hits"]["hits"][0]["_source"]
+        hit = response["hits"]["hits"][0]
+        source = hit["_source"]
         
         # Check if person is in the detected entities
         people_mentioned = source.get("detections", {}).get("entities", {}).get("person_names", [])
@@ -538,36 +1031,25 @@ def search_person_in_video(
             "mentions": []
         }
         
-        # Search in transcript segments
-        transcription = source.get("pegasus_insights", {}).get("transcription", {})
-        segments = transcription.get("segments", [])
-        full_text = transcription.get("full_text", "")
+        fragments = hit.get("highlight", {}).get(TRANSCRIPT_TEXT_FIELD, [])
         
-        if include_context and full_text:
-            # Find mentions in full text with context
-            import re
-            pattern = re.compile(re.escape(person_name), re.IGNORECASE)
+        if include_context and fragments:
+            # Locate each occurrence in the transcript segments for timestamps
+            name_lower = " ".join(person_name.split()).lower()
+            segments = source.get("pegasus_insights", {}).get("transcription", {}).get("segments", [])
+            occurrences = find_mention_timestamps(segments, person_name)
             
-            for match in pattern.finditer(full_text):
-                start_idx = max(0, match.start() - 100)
-                end_idx = min(len(full_text), match.end() + 100)
-                context = full_text[start_idx:end_idx]
-                
-                # Find corresponding timestamp
-                char_count = 0
-                timestamp = None
-                for segment in segments:
-                    segment_text = segment.get("text", "")
-                    if char_count <= match.start() < char_count + len(segment_text):
-                        timestamp = segment.get("start_time")
-                        break
-                    char_count += len(segment_text) + 1  # +1 for space
-                
+            # Fragments come back in transcript order; one fragment may hold several mentions
+            next_occurrence = 0
+            for context in fragments:
+                timestamp, position = (occurrences[next_occurrence]
+                                       if next_occurrence < len(occurrences) else (None, None))
                 result["mentions"].append({
                     "context": context,
                     "timestamp": timestamp,
-                    "character_position": match.start()
+                    "character_position": position
                 })
+                next_occurrence += max(1, context.lower().count(name_lower))
         
         result["total_mentions"] = len(result["mentions"])
         
@@ -593,11 +1075,11 @@ def get_video_sentiment(video_id: str) -> Dict[str, Any]:
     """
     query = {
         "query": {"term": {"video_id": video_id}},
-        "_source": ["video_id", "video_title", "pegasus_insights.sentiment_analysis"]
+        "_source": _SENTIMENT_SOURCE_FIELDS
     }
     
     try:
-        response = opensearch_client.search(index=INDEX_NAME, body=query)
+        response = search_index(query)
         
         if response["hits"]["total"]["value"] == 0:
             return {
@@ -636,12 +1118,11 @@ def get_video_summary(video_id: str) -> Dict[str, Any]:
     """
     query = {
         "query": {"term": {"video_id": video_id}},
-        "_source": ["video_id", "video_title", "pegasus_insights.summary", "pegasus_insights.topics", 
-                   "pegasus_insights.hashtags", "detections.entities"]
+        "_source": _SUMMARY_SOURCE_FIELDS
     }
     
     try:
-        response = opensearch_client.search(index=INDEX_NAME, body=query)
+        response = search_index(query)
         
         if response["hits"]["total"]["value"] == 0:
             return {
@@ -670,36 +1151,52 @@ def get_video_summary(video_id: str) -> Dict[str, Any]:
         }
 
 @mcp.tool(description="Get all videos in the library")
-def get_all_videos(max_results: int = 20) -> Dict[str, Any]:
+def get_all_videos(
+    max_results: int = 20,
+    refresh: bool = False,
+    include_summary: bool = True
+) -> Dict[str, Any]:
     """
     Get all videos in the library.
     
     Args:
         max_results: Maximum number of videos to return (default: 20)
+        refresh: Bypass the short-lived result cache (default: False)
+        include_summary: Include summaries and detected entities; set False for a
+            lighter listing of ids, titles and links (default: True)
     
     Returns:
         Dictionary with all videos in the library
     """
+    cache_key = ("get_all_videos", max_results, include_summary)
+    if not refresh:
+        with _result_lock:
+            cached = _result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
     query = {
         "size": max_results,
+        "track_total_hits": False,  # Listing only, skip the global hit count
         "query": {
             "match_all": {}
         },
         "sort": [{"processing_timestamp": {"order": "desc"}}],  # Newest first
-        "_source": ["video_id", "video_title", "s3_bucket", "s3_key", "thumbnail_s3_key", "pegasus_insights.summary", 
-                   "processing_timestamp", "detections.entities"]
+        "_source": _SEARCH_SOURCE if include_summary else _LIGHT_SOURCE
     }
     
     try:
-        response = opensearch_client.search(index=INDEX_NAME, body=query)
-        results = [format_video_result(hit) for hit in response["hits"]["hits"]]
+        response = search_index(query)
+        results = [asdict(format_video_result(hit)) for hit in response["hits"]["hits"]]
         
-        return {
+        result = {
             "success": True,
-            "total_videos": response["hits"]["total"]["value"],
             "returned_videos": len(results),
             "videos": results
         }
+        with _result_lock:
+            _result_cache[cache_key] = result
+        return result
     except Exception as e:
         return {
             "success": False,
@@ -724,11 +1221,11 @@ def get_video_transcript(
     """
     query = {
         "query": {"term": {"video_id": video_id}},
-        "_source": ["video_id", "video_title", "pegasus_insights.transcription"]
+        "_source": _TRANSCRIPT_SOURCE_FIELDS
     }
     
     try:
-        response = opensearch_client.search(index=INDEX_NAME, body=query)
+        response = search_index(query)
         
         if response["hits"]["total"]["value"] == 0:
             return {
@@ -764,13 +1261,23 @@ def get_video_transcript(
         }
 
 @mcp.tool(description="Check OpenSearch connection and index status")
-def check_opensearch_status() -> Dict[str, Any]:
+def check_opensearch_status(refresh: bool = False) -> Dict[str, Any]:
     """
     Check if the OpenSearch connection is working and index exists.
     
+    Args:
+        refresh: Bypass the short-lived result cache (default: False)
+    
     Returns:
         Dictionary with connection status
     """
+    cache_key = ("check_opensearch_status",)
+    if not refresh:
+        with _result_lock:
+            cached = _result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
     try:
         # Test OpenSearch connection
         info = opensearch_client.info()
@@ -784,7 +1291,7 @@ def check_opensearch_status() -> Dict[str, Any]:
             stats = opensearch_client.indices.stats(index=INDEX_NAME)
             doc_count = stats["indices"][INDEX_NAME]["primaries"]["docs"]["count"]
         
-        return {
+        result = {
             "opensearch_accessible": True,
             "endpoint": OPENSEARCH_ENDPOINT,
             "index": INDEX_NAME,
@@ -793,6 +1300,9 @@ def check_opensearch_status() -> Dict[str, Any]:
             "cluster_name": info.get("cluster_name"),
             "status": "healthy"
         }
+        with _result_lock:
+            _result_cache[cache_key] = result
+        return result
     except Exception as e:
         return {
             "opensearch_accessible": False,
@@ -832,8 +1342,7 @@ def search_videos_by_title(
                     }
                 }
             },
-            "_source": ["video_id", "video_title", "s3_bucket", "s3_key", "thumbnail_s3_key", "pegasus_insights.summary", 
-                       "processing_timestamp", "detections.entities"]
+            "_source": _SEARCH_SOURCE
         }
     else:
         query = {
@@ -846,13 +1355,12 @@ def search_videos_by_title(
                     }
                 }
             },
-            "_source": ["video_id", "video_title", "s3_bucket", "s3_key", "thumbnail_s3_key", "pegasus_insights.summary", 
-                       "processing_timestamp", "detections.entities"]
+            "_source": _SEARCH_SOURCE
         }
     
     try:
-        response = opensearch_client.search(index=INDEX_NAME, body=query)
-        results = [format_video_result(hit) for hit in response["hits"]["hits"]]
+        response = search_index(query)
+        results = [asdict(format_video_result(hit)) for hit in response["hits"]["hits"]]
         
         return {
             "success": True,
@@ -896,15 +1404,8 @@ def search_videos_hybrid(
         
         # Add semantic search if enabled
         if use_semantic:
-            query_embedding = get_embedding_from_text(query)
-            queries.append({
-                "knn": {
-                    "pegasus_insights_embedding": {
-                        "vector": query_embedding,
-                        "k": max_results
-                    }
-                }
-            })
+            query_embedding = get_cached_embedding(query)
+            queries.append(knn_query("pegasus_insights_embedding", query_embedding, max_results))
         
         # Add keyword search
         keyword_clauses = []
@@ -913,12 +1414,7 @@ def search_videos_hybrid(
         keyword_clauses.append({
             "multi_match": {
                 "query": query,
-                "fields": [
-                    "video_title^3",  # Boost title matches
-                    "pegasus_insights.summary^2",
-                    "pegasus_insights.topics",
-                    "pegasus_content_for_embedding"
-                ],
+                "fields": _HYBRID_QUERY_FIELDS,
                 "type": "best_fields"
             }
         })
@@ -929,13 +1425,7 @@ def search_videos_hybrid(
                 keyword_clauses.append({
                     "multi_match": {
                         "query": keyword,
-                        "fields": [
-                            "detections.entities.brands^2",
-                            "detections.entities.companies^2",
-                            "detections.entities.person_names^2",
-                            "video_title",
-                            "pegasus_insights.summary"
-                        ],
+                        "fields": _HYBRID_KEYWORD_FIELDS,
                         "type": "phrase"
                     }
                 })
@@ -953,28 +1443,36 @@ def search_videos_hybrid(
         if len(queries) == 1:
             search_query = {
                 "size": max_results,
+                "track_total_hits": False,
                 "query": queries[0],
-                "_source": ["video_id", "video_title", "s3_bucket", "s3_key", "thumbnail_s3_key", "pegasus_insights.summary", 
-                           "processing_timestamp", "detections.entities"]
+                "_source": _SEARCH_SOURCE
             }
         else:
-            # Combine with weights
+            # Native hybrid query: a temporary search pipeline min-max normalizes the
+            # kNN and keyword scores per sub-query, then combines them with weights
+            semantic_weight = min(max(semantic_weight, 0.0), 1.0)
             search_query = {
                 "size": max_results,
+                "track_total_hits": False,
                 "query": {
-                    "bool": {
-                        "should": [
-                            {"constant_score": {"filter": queries[0], "boost": semantic_weight}},
-                            {"constant_score": {"filter": queries[1], "boost": 1 - semantic_weight}}
-                        ]
-                    }
+                    "hybrid": {"queries": queries}
+                },
+                "search_pipeline": {
+                    "phase_results_processors": [{
+                        "normalization-processor": {
+                            "normalization": _HYBRID_NORMALIZATION,
+                            "combination": {
+                                "technique": "arithmetic_mean",
+                                "parameters": {"weights": [semantic_weight, 1 - semantic_weight]}
+                            }
+                        }
+                    }]
                 },
-                "_source": ["video_id", "video_title", "s3_bucket", "s3_key", "thumbnail_s3_key", "pegasus_insights.summary", 
-                           "processing_timestamp", "detections.entities"]
+                "_source": _SEARCH_SOURCE
             }
         
-        response = opensearch_client.search(index=INDEX_NAME, body=search_query)
-        results = [format_video_result(hit) for hit in response["hits"]["hits"]]
+        response = search_index(search_query)
+        results = [asdict(format_video_result(hit)) for hit in response["hits"]["hits"]]
         
         return {
             "success": True,
@@ -998,7 +1496,8 @@ def find_similar_videos(
     reference_video_id: str,
     use_visual_similarity: bool = True,
     similarity_threshold: Optional[float] = None,
-    max_results: int = 10
+    max_results: int = 10,
+    mmr_lambda: Optional[float] = None
 ) -> Dict[str, Any]:
     """
     Find videos similar to a reference video using embedding similarity.
@@ -1008,6 +1507,8 @@ def find_similar_videos(
         use_visual_similarity: Use visual embeddings (True) or text embeddings (False)
         similarity_threshold: Minimum similarity score (0-1, default: 0.7)
         max_results: Maximum number of results (default: 10)
+        mmr_lambda: Re-rank for diversity with Maximal Marginal Relevance; 1.0 is pure
+            similarity, lower values favour variety (e.g. 0.7). Default: None (off)
     
     Returns:
         Dictionary with similar videos
@@ -1017,32 +1518,41 @@ def find_similar_videos(
         if similarity_threshold is None:
             similarity_threshold = DEFAULT_SIMILARITY_THRESHOLD
         
-        # First, get the reference video's embeddings
-        query = {
-            "query": {"term": {"video_id": reference_video_id}},
-            "_source": ["video_id", "video_title", "video_content_embedding", 
-                       "pegasus_insights_embedding", "pegasus_insights.summary"]
-        }
-        
-        response = opensearch_client.search(index=INDEX_NAME, body=query)
-        
-        if response["hits"]["total"]["value"] == 0:
-            return {
-                "success": False,
-                "error": f"Reference video with ID {reference_video_id} not found",
-                "similar_videos": []
-            }
-        
-        reference_video = response["hits"]["hits"][0]["_source"]
-        
         # Choose which embedding to use
         if use_visual_similarity:
-            reference_embedding = reference_video.get("video_content_embedding")
             embedding_field = "video_content_embedding"
         else:
-            reference_embedding = reference_video.get("pegasus_insights_embedding")
             embedding_field = "pegasus_insights_embedding"
         
+        # First, get the reference video's embedding (cached after the first lookup)
+        cache_key = (reference_video_id, embedding_field)
+        with _reference_lock:
+            reference_video = _reference_cache.get(cache_key)
+        
+        if reference_video is None:
+            query = {
+                "size": 1,
+                "track_total_hits": False,
+                "query": {"term": {"video_id": reference_video_id}},
+                "_source": _REFERENCE_SOURCE_FIELDS + (embedding_field,)
+            }
+            
+            response = search_index(query)
+            
+            if not response["hits"]["hits"]:
+                return {
+                    "success": False,
+                    "error": f"Reference video with ID {reference_video_id} not found",
+                    "similar_videos": []
+                }
+            
+            reference_video = response["hits"]["hits"][0]["_source"]
+            if reference_video.get(embedding_field):
+                with _reference_lock:
+                    _reference_cache[cache_key] = reference_video
+        
+        reference_embedding = reference_video.get(embedding_field)
+        
         if not reference_embedding:
             return {
                 "success": False,
@@ -1050,31 +1560,39 @@ def find_similar_videos(
                 "similar_videos": []
             }
         
-        # Search for similar videos using kNN
+        # Search for similar videos using kNN; MMR needs a wider candidate set
+        # and the candidates' embeddings
+        fetch_size = max_results * MMR_FETCH_MULTIPLIER if mmr_lambda is not None else max_results
         search_query = {
-            "size": max_results + 1,  # +1 to exclude the reference video
-            "query": {
-                "knn": {
-                    embedding_field: {
-                        "vector": reference_embedding,
-                        "k": max_results + 1
-                    }
-                }
-            },
-            "_source": ["video_id", "video_title", "s3_bucket", "s3_key", "thumbnail_s3_key", 
-                       "pegasus_insights.summary", "processing_timestamp", "detections.entities"],
+            "size": fetch_size,
+            "track_total_hits": False,
+            "query": _exclude_reference(
+                knn_query(embedding_field, reference_embedding, fetch_size), reference_video_id
+            ),
+            "_source": (_SEARCH_SOURCE if mmr_lambda is None
+                        else {"includes": _SEARCH_SOURCE_FIELDS + (embedding_field,)}),
             "min_score": similarity_threshold
         }
         
-        response = opensearch_client.search(index=INDEX_NAME, body=search_query)
+        response = search_index(search_query)
+        hits = response["hits"]["hits"]
+        
+        if mmr_lambda is not None and hits:
+            hits = [h for h in hits if h["_source"].get(embedding_field)]
+            selected = mmr_select(
+                reference_embedding,
+                [h["_source"][embedding_field] for h in hits],
+                max_results,
+                mmr_lambda
+            )
+            hits = [hits[i] for i in selected]
         
-        # Filter out the reference video and format results
+        # Format results
         similar_videos = []
-        for hit in response["hits"]["hits"]:
-            if hit["_source"]["video_id"] != reference_video_id:
-                video_result = format_video_result(hit)
-                video_result["similarity_score"] = hit.get("_score", 0)
-                similar_videos.append(video_result)
+        for hit in hits:
+            video_result = asdict(format_video_result(hit))
+            video_result["similarity_score"] = hit.get("_score", 0)
+            similar_videos.append(video_result)
         
         return {
             "success": True,
@@ -1083,7 +1601,7 @@ def find_similar_videos(
                 "video_title": reference_video.get("video_title", "Untitled"),
                 "summary": reference_video.get("pegasus_insights", {}).get("summary", "")
             },
-            "similar_videos": similar_videos[:max_results],
+            "similar_videos": similar_videos,
             "total_found": len(similar_videos),
             "similarity_type": "visual" if use_visual_similarity else "text-based",
             "embedding_field_used": embedding_field
@@ -1097,8 +1615,201 @@ def find_similar_videos(
             "similar_videos": []
         }
 
+@mcp.tool(description="Find videos similar to each of several reference videos in one request")
+def find_similar_videos_batch(
+    reference_video_ids: List[str],
+    use_visual_similarity: bool = True,
+    similarity_threshold: Optional[float] = None,
+    max_results: int = 10
+) -> Dict[str, Any]:
+    """
+    Find similar videos for several reference videos using two multi-search round-trips:
+    one for the reference embeddings and one for all kNN searches.
+    
+    Args:
+        reference_video_ids: The video IDs to find similar videos for
+        use_visual_similarity: Use visual embeddings (True) or text embeddings (False)
+        similarity_threshold: Minimum similarity score (0-1, default: 0.7)
+        max_results: Maximum number of results per reference video (default: 10)
+    
+    Returns:
+        Dictionary with similar videos keyed by reference video ID
+    """
+    if not reference_video_ids:
+        return {
+            "success": False,
+            "error": "No reference video IDs provided",
+            "results": {}
+        }
+    
+    if similarity_threshold is None:
+        similarity_threshold = DEFAULT_SIMILARITY_THRESHOLD
+    embedding_field = "video_content_embedding" if use_visual_similarity else "pegasus_insights_embedding"
+    
+    try:
+        # Round-trip 1: reference embeddings not already cached
+        references = {}
+        missing_ids = []
+        with _reference_lock:
+            for video_id in reference_video_ids:
+                cached = _reference_cache.get((video_id, embedding_field))
+                if cached is not None:
+                    references[video_id] = cached
+                else:
+                    missing_ids.append(video_id)
+        
+        not_found = []
+        errors = {}
+        if missing_ids:
+            lookup_body = []
+            for video_id in missing_ids:
+                lookup_body.append({"index": INDEX_NAME})
+                lookup_body.append({
+                    "size": 1,
+                    "query": {"term": {"video_id": video_id}},
+                    "_source": _REFERENCE_SOURCE_FIELDS + (embedding_field,)
+                })
+            lookup_response = msearch_index(lookup_body)
+            
+            for video_id, item in zip(missing_ids, lookup_response["responses"]):
+                if "error" in item:
+                    errors[video_id] = str(item["error"])
+                    continue
+                hits = item["hits"]["hits"]
+                if not hits or not hits[0]["_source"].get(embedding_field):
+                    not_found.append(video_id)
+                    continue
+                references[video_id] = hits[0]["_source"]
+                with _reference_lock:
+                    _reference_cache[(video_id, embedding_field)] = hits[0]["_source"]
+        
+        # Round-trip 2: one kNN search per reference video
+        results = {}
+        if references:
+            knn_body = []
+            for video_id, reference in references.items():
+                knn_body.append({"index": INDEX_NAME})
+                knn_body.append({
+                    "size": max_results,
+                    "track_total_hits": False,
+                    "query": _exclude_reference(
+                        knn_query(embedding_field, reference[embedding_field], max_results), video_id
+                    ),
+                    "_source": _SEARCH_SOURCE,
+                    "min_score": similarity_threshold
+                })
+            knn_response = msearch_index(knn_body)
+            
+            for (video_id, reference), item in zip(references.items(), knn_response["responses"]):
+                if "error" in item:
+                    errors[video_id] = str(item["error"])
+                    continue
+                similar_videos = []
+                for hit in item["hits"]["hits"]:
+                    video_result = asdict(format_video_result(hit))
+                    video_result["similarity_score"] = hit.get("_score", 0)
+                    similar_videos.append(video_result)
+                results[video_id] = {
+                    "video_title": reference.get("video_title", "Untitled"),
+                    "similar_videos": similar_videos
+                }
+        
+        result = {
+            "success": True,
+            "results": results,
+            "found": len(results),
+            "not_found": not_found,
+            "similarity_type": "visual" if use_visual_similarity else "text-based",
+            "embedding_field_used": embedding_field
+        }
+        if errors:
+            result["errors"] = errors
+        
+        return result
+        
+    except Exception as e:
+        logger.error(f"Error finding similar videos in batch: {e}")
+        return {
+            "success": False,
+            "error": f"Failed to find similar videos: {str(e)}",
+            "results": {}
+        }
+
+def decode_base64_to_file(data: str, file_obj, chunk_size: int = BASE64_DECODE_CHUNK_SIZE) -> None:
+    """
+    Decode base64 text into file_obj chunk by chunk, so memory use stays
+    constant instead of holding the whole decoded video.
+    
+    Whitespace is ignored; chunks are cut on 4-character boundaries.
+    """
+    pending = ""
+    for start in range(0, len(data), chunk_size):
+        chunk = pending + "".join(data[start:start + chunk_size].split())
+        cut = len(chunk) - len(chunk) % 4
+        file_obj.write(base64.b64decode(chunk[:cut]))
+        pending = chunk[cut:]
+    if pending:
+        raise ValueError("base64 data length is not a multiple of 4")
+
+def _thumbnail_with_pyav(video_path: str) -> str:
+    """Decode one frame in-process with PyAV and return it as a base64 JPEG"""
+    import av
+    
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        # Seek to 2 seconds (or stay at 0 if the video is shorter)
+        if (container.duration or 0) > THUMBNAIL_OFFSET_SECONDS * av.time_base:
+            container.seek(int(THUMBNAIL_OFFSET_SECONDS / stream.time_base), stream=stream)
+        frame = next(container.decode(stream))
+        height = max(1, round(THUMBNAIL_WIDTH * frame.height / frame.width))
+        image = frame.to_image().resize((THUMBNAIL_WIDTH, height))
+    
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=80)
+    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+
+def _thumbnail_with_ffmpeg(video_path: str) -> str:
+    """Extract one frame with the ffmpeg CLI and return it as a base64 JPEG"""
+    thumbnail_path = f"{video_path}_thumb.jpg"
+    try:
+        # Extract frame at 2 seconds (or 0 if video is shorter)
+        cmd = [
+            'ffmpeg', '-i', video_path,
+            '-ss', str(THUMBNAIL_OFFSET_SECONDS), '-vframes', '1',
+            '-vf', f'scale={THUMBNAIL_WIDTH}:-1',
+            '-y', thumbnail_path
+        ]
+        
+        subprocess.run(cmd, capture_output=True, check=True)
+        
+        # Read and encode thumbnail
+        with open(thumbnail_path, 'rb') as thumb_file:
+            return base64.b64encode(thumb_file.read()).decode('utf-8')
+        
+    finally:
+        # Clean up thumbnail file
+        if os.path.exists(thumbnail_path):
+            os.unlink(thumbnail_path)
+
+def make_video_thumbnail(video_path: str) -> Optional[str]:
+    """
+    Extract a frame from a video, in-process with PyAV when it is installed,
+    otherwise with the ffmpeg CLI.
+    
+    Returns:
+        Base64 encoded 320px-wide JPEG, or None if the frame could not be extracted
+    """
+    try:
+        try:
+            return _thumbnail_with_pyav(video_path)
+        except ImportError:
+            return _thumbnail_with_ffmpeg(video_path)
+    except Exception as e:
+        logger.warning(f"Could not generate thumbnail: {e}")
+        return None
+
 @mcp.tool(description="Search for similar videos by uploading a video file")
-def search_by_video_upload(
+async def search_by_video_upload(
     video_base64: str,
     video_filename: str,
     use_visual_similarity: bool = True,
@@ -1121,6 +1832,7 @@ def search_by_video_upload(
     temp_video_path = None
     temp_s3_key = None
     thumbnail_base64 = None
+    thumbnail_task = None
     
     try:
         # Validate inputs
@@ -1138,28 +1850,28 @@ def search_by_video_upload(
                 "similar_videos": []
             }
         
-        # Decode base64 video
-        try:
-            video_data = base64.b64decode(video_base64)
-        except Exception as e:
-            return {
-                "success": False,
-                "error": f"Invalid base64 video data: {str(e)}",
-                "similar_videos": []
-            }
-        
-        # Save video to temporary file
+        # Decode the base64 video straight into a temporary file
         with tempfile.NamedTemporaryFile(suffix=Path(video_filename).suffix, delete=False) as tmp_file:
-            tmp_file.write(video_data)
             temp_video_path = tmp_file.name
+            try:
+                await run_blocking(decode_base64_to_file, video_base64, tmp_file)
+            except (binascii.Error, ValueError) as e:
+                return {
+                    "success": False,
+                    "error": f"Invalid base64 video data: {str(e)}",
+                    "similar_videos": []
+                }
         
         # Upload to temporary S3 location
-        s3_client = boto3.client('s3')
         temp_bucket = os.getenv('TEMP_VIDEO_BUCKET', os.getenv('S3_BUCKET'))
         temp_s3_key = f"temp-search/{uuid.uuid4().hex}/{video_filename}"
         
+        # Generate the thumbnail (if requested) while the upload runs
+        if generate_thumbnail:
+            thumbnail_task = asyncio.create_task(run_blocking(make_video_thumbnail, temp_video_path))
+        
         logger.info(f"Uploading temporary video to S3: {temp_bucket}/{temp_s3_key}")
-        s3_client.upload_file(temp_video_path, temp_bucket, temp_s3_key)
+        await run_blocking(s3_client.upload_file, temp_video_path, temp_bucket, temp_s3_key)
         
         # Generate presigned URL for Twelve Labs
         video_url = s3_client.generate_presigned_url(
@@ -1168,67 +1880,43 @@ def search_by_video_upload(
             ExpiresIn=7200  # 2 hours for processing
         )
         
-        # Generate thumbnail if requested
-        if generate_thumbnail:
-            try:
-                # Use ffmpeg to generate thumbnail
-                import subprocess
-                thumbnail_path = f"{temp_video_path}_thumb.jpg"
-                
-                # Extract frame at 2 seconds (or 0 if video is shorter)
-                cmd = [
-                    'ffmpeg', '-i', temp_video_path,
-                    '-ss', '2', '-vframes', '1',
-                    '-vf', 'scale=320:-1',
-                    '-y', thumbnail_path
-                ]
-                
-                subprocess.run(cmd, capture_output=True, check=True)
-                
-                # Read and encode thumbnail
-                with open(thumbnail_path, 'rb') as thumb_file:
-                    thumbnail_base64 = base64.b64encode(thumb_file.read()).decode('utf-8')
-                
-                # Clean up thumbnail file
-                os.unlink(thumbnail_path)
-                
-            except Exception as e:
-                logger.warning(f"Could not generate thumbnail: {e}")
-        
         # Initialize Twelve Labs client
         tl_client = get_twelve_labs_client()
         
         # Upload video to Twelve Labs and wait for processing
         logger.info(f"Uploading video to Twelve Labs index: {TWELVE_LABS_INDEX_ID}")
-        task = tl_client.task.create(
+        task = await run_blocking(
+            tl_client.task.create,
             index_id=TWELVE_LABS_INDEX_ID,
             url=video_url
         )
         
-        # Wait for processing with timeout
+        # Wait for processing with timeout, backing off between status checks
         max_wait_time = 300  # 5 minutes
-        start_time = datetime.now()
+        start_time = time.monotonic()
+        delay = UPLOAD_POLL_INITIAL_DELAY
         
         while task.status not in ["ready", "failed"]:
-            if (datetime.now() - start_time).seconds > max_wait_time:
+            if time.monotonic() - start_time > max_wait_time:
                 raise TimeoutError("Video processing timed out")
             
+            # Wait before checking again without blocking the event loop
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, UPLOAD_POLL_MAX_DELAY)
+            
             # Refresh task status
-            task = tl_client.task.retrieve(task.id)
+            task = await run_blocking(tl_client.task.retrieve, task.id)
             logger.info(f"Task status: {task.status}")
             
             if task.status == "failed":
                 raise Exception(f"Video processing failed: {task.error_message}")
-            
-            # Wait before checking again
-            import time
-            time.sleep(5)
         
         video_id = task.video_id
         logger.info(f"Video processed successfully: {video_id}")
         
         # Get embeddings for the uploaded video
-        embeddings_result = tl_client.index.video.retrieve(
+        embeddings_result = await run_blocking(
+            tl_client.index.video.retrieve,
             index_id=TWELVE_LABS_INDEX_ID,
             id=video_id,
             embedding_option=["visual-text", "audio"]
@@ -1236,46 +1924,50 @@ def search_by_video_upload(
         
         # Calculate average embedding
         if embeddings_result.embedding and embeddings_result.embedding.video_embedding.segments:
-            all_embeddings = []
-            for segment in embeddings_result.embedding.video_embedding.segments:
-                all_embeddings.append(segment.embeddings_float)
+            segments = embeddings_result.embedding.video_embedding.segments
+            # Fill one contiguous float32 matrix instead of a list of lists
+            segment_matrix = np.empty((len(segments), len(segments[0].embeddings_float)), dtype=np.float32)
+            for i, segment in enumerate(segments):
+                segment_matrix[i] = segment.embeddings_float
             
-            avg_embedding = np.mean(all_embeddings, axis=0).tolist()
+            # L2-normalize the mean; kNN scoring is cosine
+            mean_embedding = segment_matrix.mean(axis=0)
+            norm = np.linalg.norm(mean_embedding)
+            if norm > 0:
+                mean_embedding /= norm
+            avg_embedding = mean_embedding  # serialized directly by OrjsonSerializer
             
             # Search for similar videos using the embedding
             embedding_field = "video_content_embedding" if use_visual_similarity else "pegasus_insights_embedding"
+            query_vector = avg_embedding if use_visual_similarity else quantize_embedding(avg_embedding)
             
             search_query = {
                 "size": max_results,
-                "query": {
-                    "knn": {
-                        embedding_field: {
-                            "vector": avg_embedding,
-                            "k": max_results
-                        }
-                    }
-                },
-                "_source": ["video_id", "video_title", "s3_bucket", "s3_key", "thumbnail_s3_key", 
-                           "pegasus_insights.summary", "processing_timestamp", "detections.entities"],
+                "track_total_hits": False,
+                "query": knn_query(embedding_field, query_vector, max_results),
+                "_source": _SEARCH_SOURCE,
                 "min_score": DEFAULT_SIMILARITY_THRESHOLD
             }
             
-            response = opensearch_client.search(index=INDEX_NAME, body=search_query)
+            response = await run_blocking(search_index, search_query)
             
             # Format results
             similar_videos = []
             for hit in response["hits"]["hits"]:
-                video_result = format_video_result(hit)
+                video_result = asdict(format_video_result(hit))
                 video_result["similarity_score"] = hit.get("_score", 0)
                 similar_videos.append(video_result)
             
             # Delete the video from Twelve Labs (cleanup)
             try:
-                tl_client.index.video.delete(index_id=TWELVE_LABS_INDEX_ID, id=video_id)
+                await run_blocking(tl_client.index.video.delete, index_id=TWELVE_LABS_INDEX_ID, id=video_id)
                 logger.info(f"Deleted temporary video from Twelve Labs: {video_id}")
             except Exception as e:
                 logger.warning(f"Could not delete video from Twelve Labs: {e}")
             
+            if thumbnail_task:
+                thumbnail_base64 = await thumbnail_task
+            
             return {
                 "success": True,
                 "uploaded_video": {
@@ -1305,6 +1997,10 @@ def search_by_video_upload(
         }
         
     finally:
+        # Let ffmpeg finish reading the video before it is removed
+        if thumbnail_task:
+            await thumbnail_task
+        
         # Cleanup temporary files
         if temp_video_path and os.path.exists(temp_video_path):
             os.unlink(temp_video_path)
@@ -1312,7 +2008,7 @@ def search_by_video_upload(
         # Cleanup S3 temporary file
         if temp_s3_key:
             try:
-                s3_client.delete_object(Bucket=temp_bucket, Key=temp_s3_key)
+                await run_blocking(s3_client.delete_object, Bucket=temp_bucket, Key=temp_s3_key)
                 logger.info(f"Deleted temporary S3 file: {temp_s3_key}")
             except Exception as e:
                 logger.warning(f"Could not delete temporary S3 file: {e}")
@@ -1334,7 +2030,7 @@ def test_embedding_generation(
     """
     try:
         # Generate embedding
-        embedding = get_embedding_from_text(text)
+        embedding = get_cached_embedding(text, input_type)
         
         # Also show what the content would look like if prepared from video data
         sample_video_data = {
@@ -1344,16 +2040,18 @@ def test_embedding_generation(
             }
         }
         prepared_content = prepare_content_for_embedding(sample_video_data)
+        vector = np.asarray(embedding, dtype=np.float32)
         
         return {
             "success": True,
             "text_length": len(text),
             "embedding_dimension": len(embedding),
-            "embedding_preview": embedding[:10],  # First 10 values
+            "embedding_preview": embedding[:10].tolist(),  # First 10 values
             "embedding_stats": {
-                "min": min(embedding),
-                "max": max(embedding),
-                "mean": sum(embedding) / len(embedding)
+                "min": float(vector.min()),
+                "max": float(vector.max()),
+                "mean": float(vector.mean()),
+                "l2_norm": float(np.linalg.norm(vector))
             },
             "prepared_content_preview": prepared_content[:500],
             "input_type": input_type
@@ -1380,6 +2078,10 @@ if __name__ == "__main__":
         print(f"✓ OpenSearch Endpoint: {OPENSEARCH_ENDPOINT}")
         print(f"✓ Index: {INDEX_NAME}")
         print(f"✓ AWS Region: {AWS_REGION}")
+        if ensure_index_mapping():
+            print("✓ kNN fields use quantized vector storage")
+        else:
+            print("⚠️  Index mapping predates kNN quantization (see README: Re-indexing)")
     
     # Check AWS credentials
     try:
@@ -1396,8 +2098,10 @@ if __name__ == "__main__":
     print("  - search_videos_hybrid: Combined keyword and semantic search")
     print("  - search_videos_by_title: Search by video title with fuzzy matching")
     print("  - find_similar_videos: Find videos similar to a reference video")
+    print("  - find_similar_videos_batch: Find similar videos for several references in one request")
     print("  - search_by_video_upload: Upload video to find similar videos")
     print("  - get_video_details: Get comprehensive video information")
+    print("  - get_videos_details_batch: Get information for several videos in one request")
     print("  - search_person_in_video: Find person mentions with timestamps")
     print("  - get_video_sentiment: Get video sentiment analysis")
     print("  - get_video_summary: Get video summary and key topics")
@@ -1409,5 +2113,11 @@ if __name__ == "__main__":
     print(f"\nServer will run at http://{MCP_HOST}:{MCP_PORT}/sse")
     print(f"(Using FASTMCP_PORT={MCP_PORT} environment variable)")
     
+    if OPENSEARCH_ENDPOINT:
+        if warmup_knn_index(reschedule=True):
+            print("✓ kNN graphs warmed up")
+        else:
+            print("⚠️  kNN warmup skipped (see logs)")
+    
     # Run with SSE transport for Strands
     mcp.run(transport="sse")
\ No newline at end of file
@@ -4,6 +4,10 @@ import boto3
 import json
 from typing import Dict, Any, List, Optional
 
+# Faiss scalar quantizer encoder for float embedding fields (fp16 storage)
+FP16_ENCODER = {"name": "sq", "parameters": {"type": "fp16"}}
+
+
 class VideoInsightsIndexManager:
     """Manages OpenSearch index for video insights with flexible schema"""
     
@@ -52,10 +56,12 @@ class VideoInsightsIndexManager:
                                 "method": {
                                     "name": "hnsw",
                                     "space_type": "cosinesimil",
-                                    "engine": "nmslib",
+                                    "engine": "faiss",
                                     "parameters": {
                                         "ef_construction": 128,
-                                        "m": 16
+                                        "ef_search": 100,
+                                        "m": 16,
+                                        "encoder": FP16_ENCODER
                                     }
                                 }
                             }
@@ -91,14 +97,19 @@ class VideoInsightsIndexManager:
                     "upload_timestamp": {"type": "date"},
                     "processing_timestamp": {"type": "date"},
                     
-                    # First embedding field - for general video content
+                    # First embedding field - for general video content.
+                    # On-disk mode keeps 1-bit (32x) binary-quantized vectors in memory
+                    # for the HNSW walk and rescores oversampled candidates with the
+                    # full-precision vectors kept on disk.
                     "video_content_embedding": {
                         "type": "knn_vector",
                         "dimension": 1024,
+                        "mode": "on_disk",
+                        "compression_level": "32x",
                         "method": {
                             "name": "hnsw",
                             "space_type": "cosinesimil",
-                            "engine": "nmslib",
+                            "engine": "faiss",
                             "parameters": {
                                 "ef_construction": 128,
                                 "m": 16
@@ -106,14 +117,19 @@ class VideoInsightsIndexManager:
                         }
                     },
                     
-                    # Second embedding field - for Pegasus insights embedded with Cohere
+                    # Second embedding field - for Pegasus insights embedded with Cohere.
+                    # Stored as int8 byte vectors (Cohere "int8" embedding type), a 4x
+                    # smaller index than float32.
+                    # Lucene keeps cosinesimil scoring for byte vectors, so similarity
+                    # thresholds mean the same as for the float fields.
                     "pegasus_insights_embedding": {
                         "type": "knn_vector",
                         "dimension": 1024,  # Cohere embedding dimension
+                        "data_type": "byte",
                         "method": {
                             "name": "hnsw",
                             "space_type": "cosinesimil",
-                            "engine": "nmslib",
+                            "engine": "lucene",
                             "parameters": {
                                 "ef_construction": 128,
                                 "m": 16
@@ -1,21 +1,40 @@
 import json
+import base64
+import gzip
+import hashlib
+import orjson
 import boto3
 import os
 import time
 import requests
 import numpy as np
-from typing import Dict, Any, List, Optional
-from opensearchpy import OpenSearch, RequestsHttpConnection, AWSV4SignerAuth, helpers
+from typing import Dict, Any, List, Optional, Tuple
+from opensearchpy import OpenSearch, RequestsHttpConnection, AWSV4SignerAuth, SerializationError, helpers
+from opensearchpy.serializer import JSONSerializer
 from dataclasses import dataclass, asdict
-from datetime import datetime
+from datetime import datetime, timezone
+from urllib.parse import urlparse
 import logging
+import random
+import textwrap
+from functools import lru_cache
+from itertools import islice
+from botocore.config import Config
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Import Twelve Labs SDK
 from twelvelabs import TwelveLabs
 from twelvelabs.models.task import Task
 import twelvelabs
 
+# Optional: spaCy NER pre-pass for entity extraction, available when a spaCy
+# model is bundled with the function (e.g. as a Lambda layer)
+try:
+    import spacy
+except ImportError:
+    spacy = None
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
@@ -27,13 +46,159 @@ COHERE_MODEL_ID = os.environ.get('COHERE_MODEL_ID', 'cohere.embed-english-v3')
 NOVA_MODEL_ID = os.environ.get('NOVA_MODEL_ID', 'amazon.nova-lite-v1:0')
 MARENGO_MODEL_ID = os.environ.get('MARENGO_MODEL_ID', 'marengo2.7')
 NOVA_MAX_CHARS = int(os.environ.get('NOVA_MAX_CHARS', '350000'))
+# Transcriptions are split into windows of this size and sent to Nova in parallel
+NOVA_CHUNK_CHARS = int(os.environ.get('NOVA_CHUNK_CHARS', '20000'))
+NOVA_MAX_CONCURRENCY = int(os.environ.get('NOVA_MAX_CONCURRENCY', '8'))
 REGION = os.environ.get('REGION', 'us-east-1')
+# Cohere accepts up to 96 texts per embed request; batches run this many at a time
+COHERE_MAX_BATCH_SIZE = 96
+# Cohere embed v3 reads ~512 tokens; longer texts are cut to this many characters
+COHERE_MAX_CHARS = 2048
+COHERE_MAX_CONCURRENCY = int(os.environ.get('COHERE_MAX_CONCURRENCY', '8'))
+# Optional DynamoDB table caching embeddings by content hash (unset disables the cache)
+EMBEDDING_CACHE_TABLE = os.environ.get('EMBEDDING_CACHE_TABLE')
+EMBEDDING_CACHE_TTL_DAYS = int(os.environ.get('EMBEDDING_CACHE_TTL_DAYS', '30'))
+# Longest sleep between Transcribe job status checks (seconds)
+TRANSCRIBE_MAX_POLL_INTERVAL = 10
+# Upload status checks allowed before giving up (the state machine waits between checks)
+UPLOAD_MAX_POLLS = int(os.environ.get('UPLOAD_MAX_POLLS', '240'))
+# Attempts per Twelve Labs insight request (429/5xx are retried with backoff)
+INSIGHTS_MAX_ATTEMPTS = int(os.environ.get('INSIGHTS_MAX_ATTEMPTS', '4'))
+# spaCy model used to find entity candidates before asking Nova to classify them
+SPACY_MODEL = os.environ.get('SPACY_MODEL', 'en_core_web_sm')
+NER_CANDIDATE_LABELS = frozenset({'PERSON', 'ORG', 'PRODUCT'})
+NER_MAX_CANDIDATES = 300
+
+@lru_cache(maxsize=None)
+def get_aws_client(service_name: str, region_name: str = REGION):
+    """
+    Return a boto3 client shared for the lifetime of the Lambda container.
+    
+    Clients are thread-safe; sharing them skips the per-object service model
+    load and keeps one connection pool per service. Adaptive retries back off
+    automatically on throttling.
+    """
+    return boto3.client(
+        service_name,
+        region_name=region_name,
+        config=Config(
+            max_pool_connections=50,
+            tcp_keepalive=True,
+            retries={'mode': 'adaptive', 'max_attempts': 10}
+        )
+    )
+
+
+@lru_cache(maxsize=1)
+def get_opensearch_client() -> OpenSearch:
+    """
+    Return the OpenSearch client shared for the lifetime of the Lambda container,
+    so warm invocations reuse its signer and HTTPS connection pool.
+    """
+    credentials = boto3.Session().get_credentials()
+    auth = AWSV4SignerAuth(credentials, REGION, 'aoss')
+    
+    # Parse hostname from full OpenSearch endpoint URL
+    opensearch_host = OPENSEARCH_ENDPOINT.replace('https://', '').replace('http://', '')
+    
+    return OpenSearch(
+        hosts=[{'host': opensearch_host, 'port': 443}],
+        http_auth=auth,
+        use_ssl=True,
+        verify_certs=True,
+        connection_class=RequestsHttpConnection,
+        serializer=OrjsonSerializer(),
+        pool_maxsize=16,
+        http_compress=True,  # gzip request bodies (bulk payloads) and accept gzip responses
+        timeout=30,
+        max_retries=3,
+        # Not retry_on_timeout: AOSS assigns document IDs, so re-sending a bulk
+        # request that timed out after succeeding would index the video twice
+        retry_on_timeout=False
+    )
+
+
+class OrjsonSerializer(JSONSerializer):
+    """OpenSearch serializer backed by orjson; embeddings may be passed as NumPy arrays"""
+    
+    def loads(self, s):
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError as e:
+            raise SerializationError(s, e)
+    
+    def dumps(self, data):
+        # don't serialize strings
+        if isinstance(data, str):
+            return data
+        try:
+            # str, not bytes: the bulk helper joins the serialized lines with "\n"
+            return orjson.dumps(data, default=self.default, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+        except (TypeError, orjson.JSONEncodeError) as e:
+            raise SerializationError(data, e)
+
+
+@lru_cache(maxsize=1)
+def get_ner_pipeline():
+    """
+    Load the spaCy NER pipeline once per container.
+    
+    Returns None when spaCy or the model isn't installed, in which case entity
+    extraction falls back to sending the transcription itself to Nova.
+    """
+    if spacy is None:
+        return None
+    try:
+        return spacy.load(SPACY_MODEL, disable=["parser", "lemmatizer"])
+    except OSError as e:
+        logger.warning(f"spaCy model {SPACY_MODEL} unavailable, using LLM-only entity extraction: {e}")
+        return None
+
 
 class BedrockClient:
     """Client for extracting brands, companies, and names using Amazon Bedrock's Nova model"""
     
+    # Static parts of the request body, built once per container
+    _INFERENCE_CONFIG = {
+        "max_new_tokens": 2000,
+        "temperature": 0.1,  # Low temperature for consistent extraction
+        "top_p": 0.9
+    }
+    _TOOL_CONFIG = {
+        "tools": [{
+            "toolSpec": {
+                "name": "extract_entities",
+                "description": "Extract brands, companies, and person names from transcription text",
+                "inputSchema": {
+                    "json": {
+                        "type": "object",
+                        "properties": {
+                            "brands": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "List of brand names mentioned in the transcription"
+                            },
+                            "companies": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "List of company names mentioned in the transcription"
+                            },
+                            "person_names": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "List of person names mentioned in the transcription"
+                            }
+                        },
+                        "required": ["brands", "companies", "person_names"]
+                    }
+                }
+            }
+        }],
+        "toolChoice": {"any": {}}
+    }
+    
     def __init__(self, region_name: str = REGION, model_id: str = NOVA_MODEL_ID, max_chars: int = NOVA_MAX_CHARS):
-        self.bedrock = boto3.client(service_name='bedrock-runtime', region_name=region_name)
+        self.bedrock = get_aws_client('bedrock-runtime', region_name)
         self.model_id = model_id
         self.max_chars = max_chars
         self.logger = logging.getLogger(__name__)
@@ -55,7 +220,50 @@ class BedrockClient:
                 self.logger.warning(f"Transcription text too long ({len(transcription_text)} chars), truncating to {self.max_chars}")
                 transcription_text = transcription_text[:self.max_chars]
             
-            prompt = f"""You are an expert at extracting entities from video transcriptions. The transcription may contain typos and errors from speech-to-text conversion.
+            # With a local NER model, Nova only classifies the candidate spans
+            # instead of reading the whole transcription
+            nlp = get_ner_pipeline()
+            if nlp is not None:
+                candidates = self._ner_candidates(nlp, transcription_text)
+                self.logger.info(f"spaCy found {len(candidates)} entity candidates")
+                if not candidates:
+                    return {'brands': [], 'companies': [], 'person_names': []}
+                return self._invoke_entity_tool(self._candidate_prompt(candidates))
+            
+            # Otherwise extract from transcript windows in parallel and merge the results
+            chunks = textwrap.wrap(
+                transcription_text, NOVA_CHUNK_CHARS,
+                break_long_words=False, replace_whitespace=False
+            )
+            if len(chunks) <= 1:
+                return self._invoke_entity_tool(self._transcription_prompt(transcription_text))
+            
+            self.logger.info(f"Extracting entities from {len(chunks)} transcript chunks")
+            with ThreadPoolExecutor(max_workers=min(NOVA_MAX_CONCURRENCY, len(chunks))) as executor:
+                results = list(executor.map(self._extract_chunk, chunks))
+            
+            # Union per-chunk entities, keeping first-seen order
+            return {
+                key: list(dict.fromkeys(name for result in results for name in result[key]))
+                for key in ('brands', 'companies', 'person_names')
+            }
+                
+        except Exception as e:
+            self.logger.error(f"Failed to extract entities with LLM: {e}")
+            return {'brands': [], 'companies': [], 'person_names': []}
+    
+    def _extract_chunk(self, chunk: str) -> Dict[str, List[str]]:
+        """Extract entities from one transcript window; a failed window contributes nothing"""
+        try:
+            return self._invoke_entity_tool(self._transcription_prompt(chunk))
+        except Exception as e:
+            self.logger.error(f"Failed to extract entities from transcript chunk: {e}")
+            return {'brands': [], 'companies': [], 'person_names': []}
+    
+    @staticmethod
+    def _transcription_prompt(transcription_text: str) -> str:
+        """Prompt asking Nova to extract entities from (part of) a transcription"""
+        return f"""You are an expert at extracting entities from video transcriptions. The transcription may contain typos and errors from speech-to-text conversion.
 
             Analyze the following transcription and extract all:
             1. Brand names (e.g., Nike, Apple, Coca-Cola)
@@ -68,135 +276,178 @@ class BedrockClient:
             {transcription_text}
 
             Use the extract_entities tool to provide the structured results."""
+    
+    @staticmethod
+    def _ner_candidates(nlp, transcription_text: str) -> List[str]:
+        """Distinct person/organization/product spans found by spaCy, labelled for the prompt"""
+        candidates = {}
+        for ent in nlp(transcription_text).ents:
+            name = ent.text.strip()
+            if ent.label_ in NER_CANDIDATE_LABELS and name:
+                candidates.setdefault(name.lower(), f"{name} ({ent.label_})")
+        return list(candidates.values())[:NER_MAX_CANDIDATES]
+    
+    @staticmethod
+    def _candidate_prompt(candidates: List[str]) -> str:
+        """Prompt asking Nova to verify and classify NER candidates"""
+        candidate_lines = "\n".join(f"- {candidate}" for candidate in candidates)
+        return f"""You are an expert at extracting entities from video transcriptions. The transcription may contain typos and errors from speech-to-text conversion.
 
-            # Prepare the request with tool configuration
-            body = json.dumps({
-                "messages": [{
-                    "role": "user",
-                    "content": [{"text": prompt}]
-                }],
-                "inferenceConfig": {
-                    "max_new_tokens": 2000,
-                    "temperature": 0.1,  # Low temperature for consistent extraction
-                    "top_p": 0.9
-                },
-                "toolConfig": {
-                    "tools": [{
-                        "toolSpec": {
-                            "name": "extract_entities",
-                            "description": "Extract brands, companies, and person names from transcription text",
-                            "inputSchema": {
-                                "json": {
-                                    "type": "object",
-                                    "properties": {
-                                        "brands": {
-                                            "type": "array",
-                                            "items": {"type": "string"},
-                                            "description": "List of brand names mentioned in the transcription"
-                                        },
-                                        "companies": {
-                                            "type": "array",
-                                            "items": {"type": "string"},
-                                            "description": "List of company names mentioned in the transcription"
-                                        },
-                                        "person_names": {
-                                            "type": "array",
-                                            "items": {"type": "string"},
-                                            "description": "List of person names mentioned in the transcription"
-                                        }
-                                    },
-                                    "required": ["brands", "companies", "person_names"]
-                                }
-                            }
-                        }
-                    }],
-                    "toolChoice": {"any": {}}
-                }
-            })
+            A named-entity recognizer found the following candidate entities in a transcription (its label in parentheses; labels may be wrong):
+            {candidate_lines}
+
+            Classify each genuine candidate as a brand name (e.g., Nike, Apple, Coca-Cola), a company name (e.g., Microsoft Corporation, Amazon Web Services) or a person name (e.g., John Smith, Jane Doe). Correct obvious speech-to-text misspellings and drop candidates that are none of these.
+
+            Use the extract_entities tool to provide the structured results."""
+    
+    def _invoke_entity_tool(self, prompt: str) -> Dict[str, List[str]]:
+        """Send an extraction prompt to Nova and read the extract_entities tool call"""
+        # Prepare the request with tool configuration
+        body = orjson.dumps({
+            "messages": [{
+                "role": "user",
+                "content": [{"text": prompt}]
+            }],
+            "inferenceConfig": self._INFERENCE_CONFIG,
+            "toolConfig": self._TOOL_CONFIG
+        })
+        
+        # Invoke the model
+        response = self.bedrock.invoke_model(
+            modelId=self.model_id,
+            body=body,
+            contentType='application/json'
+        )
+        
+        # Parse the response
+        response_body = orjson.loads(response['body'].read())
+        
+        # Extract the content from the tool call response format
+        if 'output' in response_body and 'message' in response_body['output']:
+            message = response_body['output']['message']
             
-            # Invoke the model
-            response = self.bedrock.invoke_model(
-                modelId=self.model_id,
-                body=body,
-                contentType='application/json'
-            )
+            # Look for tool use in the message content
+            if 'content' in message:
+                for content_item in message['content']:
+                    if content_item.get('toolUse'):
+                        tool_use = content_item['toolUse']
+                        if tool_use.get('name') == 'extract_entities':
+                            # Extract entities from tool input
+                            entities = tool_use.get('input', {})
+                            
+                            # Ensure all keys exist and are lists
+                            return {
+                                'brands': entities.get('brands', []),
+                                'companies': entities.get('companies', []),
+                                'person_names': entities.get('person_names', [])
+                            }
             
-            # Parse the response
-            response_body = json.loads(response['body'].read())
+            # Fallback: try to parse as regular text response (for backwards compatibility)
+            if len(message['content']) > 0 and 'text' in message['content'][0]:
+                content_text = message['content'][0]['text']
+                try:
+                    entities = orjson.loads(content_text)
+                    return {
+                        'brands': entities.get('brands', []),
+                        'companies': entities.get('companies', []),
+                        'person_names': entities.get('person_names', [])
+                    }
+                except orjson.JSONDecodeError:
+                    self.logger.error(f"Failed to parse LLM response as JSON: {content_text}")
+                    return {'brands': [], 'companies': [], 'person_names': []}
             
-            # Extract the content from the tool call response format
-            if 'output' in response_body and 'message' in response_body['output']:
-                message = response_body['output']['message']
-                
-                # Look for tool use in the message content
-                if 'content' in message:
-                    for content_item in message['content']:
-                        if content_item.get('toolUse'):
-                            tool_use = content_item['toolUse']
-                            if tool_use.get('name') == 'extract_entities':
-                                # Extract entities from tool input
-                                entities = tool_use.get('input', {})
-                                
-                                # Ensure all keys exist and are lists
-                                return {
-                                    'brands': entities.get('brands', []),
-                                    'companies': entities.get('companies', []),
-                                    'person_names': entities.get('person_names', [])
-                                }
-                
-                # Fallback: try to parse as regular text response (for backwards compatibility)
-                if len(message['content']) > 0 and 'text' in message['content'][0]:
-                    content_text = message['content'][0]['text']
-                    try:
-                        entities = json.loads(content_text)
-                        return {
-                            'brands': entities.get('brands', []),
-                            'companies': entities.get('companies', []),
-                            'person_names': entities.get('person_names', [])
-                        }
-                    except json.JSONDecodeError:
-                        self.logger.error(f"Failed to parse LLM response as JSON: {content_text}")
-                        return {'brands': [], 'companies': [], 'person_names': []}
-                
-                self.logger.error(f"No tool use found in response: {message}")
-                return {'brands': [], 'companies': [], 'person_names': []}
-            else:
-                self.logger.error(f"Unexpected LLM response format: {response_body}")
-                return {'brands': [], 'companies': [], 'person_names': []}
-                
-        except Exception as e:
-            self.logger.error(f"Failed to extract entities with LLM: {e}")
+            self.logger.error(f"No tool use found in response: {message}")
+            return {'brands': [], 'companies': [], 'person_names': []}
+        else:
+            self.logger.error(f"Unexpected LLM response format: {response_body}")
             return {'brands': [], 'companies': [], 'person_names': []}
 
 
 class CohereEmbeddingClient:
     """Client for generating embeddings using Amazon Bedrock's Cohere model"""
     
-    def __init__(self, region_name: str = REGION):
-        self.bedrock = boto3.client(service_name='bedrock-runtime', region_name=region_name)
+    def __init__(self, region_name: str = REGION, cache_table: Optional[str] = EMBEDDING_CACHE_TABLE):
+        self.bedrock = get_aws_client('bedrock-runtime', region_name)
         self.model_id = COHERE_MODEL_ID
         self.logger = logging.getLogger(__name__)
+        # Optional content-addressed embedding cache (DynamoDB)
+        self.cache_table = cache_table
+        self.dynamodb = get_aws_client('dynamodb', region_name) if cache_table else None
+    
+    def _cache_key(self, text: str, input_type: str, embedding_type: str) -> str:
+        """Content address of an embedding: hash of model, input type, embedding type and text"""
+        content = f"{self.model_id}|{input_type}|{embedding_type}|{text}".encode('utf-8')
+        return hashlib.blake2b(content, digest_size=32).hexdigest()
+    
+    def _cache_get(self, keys: List[str], embedding_type: str) -> Dict[str, np.ndarray]:
+        """Fetch cached embeddings by key; lookup errors count as misses"""
+        found = {}
+        dtype = np.int8 if embedding_type == "int8" else np.float32
+        try:
+            for i in range(0, len(keys), 100):  # BatchGetItem limit
+                request = {self.cache_table: {
+                    'Keys': [{'cache_key': {'S': key}} for key in keys[i:i + 100]],
+                    'ProjectionExpression': '#k, #e',
+                    'ExpressionAttributeNames': {'#k': 'cache_key', '#e': 'embedding'}
+                }}
+                for _ in range(3):
+                    response = self.dynamodb.batch_get_item(RequestItems=request)
+                    for item in response['Responses'].get(self.cache_table, []):
+                        found[item['cache_key']['S']] = np.frombuffer(item['embedding']['B'], dtype=dtype)
+                    request = response.get('UnprocessedKeys')
+                    if not request:
+                        break
+        except Exception as e:
+            self.logger.warning(f"Embedding cache lookup failed: {e}")
+        return found
+    
+    def _cache_put(self, embeddings_by_key: Dict[str, np.ndarray], embedding_type: str) -> None:
+        """Store embeddings as packed binary vectors with a TTL; write errors are only logged"""
+        dtype = np.int8 if embedding_type == "int8" else np.float32
+        expires_at = str(int(time.time()) + EMBEDDING_CACHE_TTL_DAYS * 86400)
+        items = [
+            {'PutRequest': {'Item': {
+                'cache_key': {'S': key},
+                'embedding': {'B': np.asarray(embedding, dtype=dtype).tobytes()},
+                'expires_at': {'N': expires_at}
+            }}}
+            for key, embedding in embeddings_by_key.items()
+        ]
+        try:
+            for i in range(0, len(items), 25):  # BatchWriteItem limit
+                request = {self.cache_table: items[i:i + 25]}
+                for _ in range(3):
+                    response = self.dynamodb.batch_write_item(RequestItems=request)
+                    request = response.get('UnprocessedItems')
+                    if not request:
+                        break
+        except Exception as e:
+            self.logger.warning(f"Embedding cache write failed: {e}")
     
-    def generate_embeddings(self, texts: List[str], input_type: str = "search_document") -> List[float]:
+    def generate_embeddings(self, texts: List[str], input_type: str = "search_document",
+                            embedding_type: str = "float") -> np.ndarray:
         """
         Generate embeddings for video content using Cohere
         
         Args:
             texts: List of text strings to embed
             input_type: Either "search_document" for indexing or "search_query" for searching
+            embedding_type: Either "float" or "int8" (Cohere-quantized, for byte-vector fields)
             
         Returns:
-            List of embedding vectors (float type)
+            (len(texts), dim) array of float32 or int8 embeddings
         """
         try:
             # Cohere has a limit on text length, so we might need to truncate
-            # Maximum is typically 512 tokens, roughly 2048 characters
-            truncated_texts = [text[:2048] if len(text) > 2048 else text for text in texts]
+            # Maximum is typically 512 tokens, roughly 2048 characters; "truncate"
+            # lets the service drop any remaining token overflow instead of erroring
+            truncated_texts = [text[:COHERE_MAX_CHARS] for text in texts]
             
-            body = json.dumps({
+            body = orjson.dumps({
                 "texts": truncated_texts,
                 "input_type": input_type,
-                "embedding_types": ["float"]
+                "embedding_types": [embedding_type],
+                "truncate": "END"
             })
             
             response = self.bedrock.invoke_model(
@@ -206,8 +457,12 @@ class CohereEmbeddingClient:
                 contentType='application/json'
             )
             
-            response_body = json.loads(response.get('body').read())
-            embeddings = response_body.get('embeddings', {}).get('float', [])
+            response_body = orjson.loads(response.get('body').read())
+            # Convert to a compact array right away instead of carrying Python floats
+            embeddings = np.asarray(
+                response_body.get('embeddings', {}).get(embedding_type, []),
+                dtype=np.int8 if embedding_type == "int8" else np.float32
+            )
             
             self.logger.info(f"Generated {len(embeddings)} embeddings with Cohere")
             return embeddings
@@ -215,13 +470,63 @@ class CohereEmbeddingClient:
         except Exception as e:
             self.logger.error(f"Error generating Cohere embeddings: {e}")
             raise
+    
+    def generate_embeddings_batched(self, texts: List[str], input_type: str = "search_document",
+                                    embedding_type: str = "float",
+                                    batch_size: int = COHERE_MAX_BATCH_SIZE) -> List[np.ndarray]:
+        """
+        Generate embeddings for any number of texts, deduplicated and sent in
+        batches of up to 96 (the Cohere per-request limit), several batches at a time.
+        With EMBEDDING_CACHE_TABLE set, previously embedded texts are read from the cache.
+        
+        Returns:
+            One embedding per input text, in input order
+        """
+        if not texts:
+            return []
+        
+        # dict keeps first-seen order while dropping duplicates
+        unique = dict.fromkeys(texts)
+        
+        # Serve what we can from the embedding cache
+        cache_keys = {}
+        if self.cache_table:
+            cache_keys = {text: self._cache_key(text, input_type, embedding_type) for text in unique}
+            cached = self._cache_get(list(cache_keys.values()), embedding_type)
+            for text, key in cache_keys.items():
+                unique[text] = cached.get(key)
+        
+        missing_texts = [text for text, embedding in unique.items() if embedding is None]
+        batches = [missing_texts[i:i + batch_size] for i in range(0, len(missing_texts), batch_size)]
+        if cache_keys:
+            self.logger.info(f"Embedding cache: {len(unique) - len(missing_texts)} hits, {len(missing_texts)} misses")
+        
+        if not batches:
+            batch_results = []
+        elif len(batches) == 1:
+            batch_results = [self.generate_embeddings(batches[0], input_type, embedding_type)]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(batches), COHERE_MAX_CONCURRENCY)) as executor:
+                batch_results = list(executor.map(
+                    lambda batch: self.generate_embeddings(batch, input_type, embedding_type), batches
+                ))
+        
+        for batch, embeddings in zip(batches, batch_results):
+            if len(embeddings) != len(batch):
+                raise ValueError(f"Cohere returned {len(embeddings)} embeddings for {len(batch)} texts")
+            unique.update(zip(batch, embeddings))
+        
+        if cache_keys and missing_texts:
+            self._cache_put({cache_keys[text]: unique[text] for text in missing_texts}, embedding_type)
+        
+        return [unique[text] for text in texts]
 
 class TranscribeClient:
     """Client for Amazon Transcribe operations"""
     
     def __init__(self):
-        self.client = boto3.client('transcribe')
-        self.s3_client = boto3.client('s3')
+        self.client = get_aws_client('transcribe')
+        self.s3_client = get_aws_client('s3')
         self.logger = logging.getLogger(__name__)
     
     def start_transcription_job(self, video_url: str, s3_bucket: str, s3_key: str) -> str:
@@ -253,8 +558,9 @@ class TranscribeClient:
             raise
     
     def wait_for_transcription_job(self, job_name: str, max_wait_time: int = 600) -> Dict[str, Any]:
-        """Wait for transcription job to complete"""
+        """Wait for transcription job to complete, polling with exponential backoff (1s up to 10s)"""
         start_time = time.time()
+        attempt = 0
         
         while True:
             if time.time() - start_time > max_wait_time:
@@ -270,41 +576,41 @@ class TranscribeClient:
                 raise Exception(f"Transcription job {job_name} failed: {response['TranscriptionJob'].get('FailureReason', 'Unknown')}")
             
             self.logger.info(f"Transcription job {job_name} status: {status}")
-            time.sleep(10)
+            time.sleep(min(TRANSCRIBE_MAX_POLL_INTERVAL, 1.5 ** attempt + random.random()))
+            attempt += 1
+    
+    def get_transcription(self, job_name: str) -> Dict[str, Any]:
+        """Wait for a transcription job and return its parsed results"""
+        transcribe_job = self.wait_for_transcription_job(job_name)
+        return self.parse_transcription_results(transcribe_job['Transcript']['TranscriptFileUri'])
     
     def parse_transcription_results(self, transcript_uri: str) -> Dict[str, Any]:
         """Parse Transcribe results from S3"""
         try:
             # Parse bucket and key from URI (handles both S3 and HTTPS formats)
-            if transcript_uri.startswith('https://'):
-                # Parse HTTPS URL: https://s3.region.amazonaws.com/bucket/key
-                # or https://bucket.s3.region.amazonaws.com/key
-                import re
-                
-                # Try both URL patterns
-                match = re.match(r'https://s3[.-]([^.]+\.)?amazonaws\.com/([^/]+)/(.+)', transcript_uri)
-                if match:
-                    bucket = match.group(2)
-                    key = match.group(3)
-                else:
-                    # Try bucket.s3.region format
-                    match = re.match(r'https://([^.]+)\.s3[.-]([^.]+\.)?amazonaws\.com/(.+)', transcript_uri)
-                    if match:
-                        bucket = match.group(1)
-                        key = match.group(3)
-                    else:
-                        raise ValueError(f"Unable to parse S3 URL: {transcript_uri}")
+            parsed = urlparse(transcript_uri)
+            path = parsed.path.lstrip('/')
+            if parsed.scheme == 's3':
+                bucket, key = parsed.netloc, path
+            elif parsed.netloc.startswith('s3.') or parsed.netloc.startswith('s3-'):
+                # Path style: https://s3.region.amazonaws.com/bucket/key
+                bucket, _, key = path.partition('/')
+            elif '.s3.' in parsed.netloc or '.s3-' in parsed.netloc:
+                # Virtual-hosted style: https://bucket.s3.region.amazonaws.com/key
+                bucket, key = parsed.netloc.split('.s3', 1)[0], path
             else:
-                # For S3 URIs, extract bucket and key
-                parts = transcript_uri.replace('s3://', '').split('/', 1)
-                bucket = parts[0]
-                key = parts[1]
+                raise ValueError(f"Unable to parse S3 URL: {transcript_uri}")
+            
+            if not bucket or not key:
+                raise ValueError(f"Unable to parse S3 URL: {transcript_uri}")
             
             self.logger.info(f"Fetching transcript from S3: bucket={bucket}, key={key}")
             
             # Get transcript from S3 using IAM role permissions
+            # orjson parses the raw bytes directly (no intermediate str copy) and
+            # the body buffer is released as soon as the tree is built
             response = self.s3_client.get_object(Bucket=bucket, Key=key)
-            transcript_data = json.loads(response['Body'].read())
+            transcript_data = orjson.loads(response['Body'].read())
             
             # Format for OpenSearch
             formatted_transcription = {
@@ -313,15 +619,22 @@ class TranscribeClient:
                 'speaker_labels': []
             }
             
-            # Add time-aligned segments
-            for item in transcript_data['results']['items']:
-                if item['type'] == 'pronunciation':
-                    formatted_transcription['segments'].append({
-                        'text': item['alternatives'][0]['content'],
-                        'start_time': float(item.get('start_time', 0)),
-                        'end_time': float(item.get('end_time', 0)),
-                        'confidence': float(item['alternatives'][0].get('confidence', 0))
-                    })
+            # Add time-aligned segments. Transcribe reports numbers as strings; convert
+            # each column in one NumPy pass instead of float() per token.
+            words = [item for item in transcript_data['results']['items'] if item['type'] == 'pronunciation']
+            if words:
+                texts = [item['alternatives'][0]['content'] for item in words]
+                start_times = np.array([item.get('start_time', 0) for item in words], dtype=np.float64)
+                end_times = np.array([item.get('end_time', 0) for item in words], dtype=np.float64)
+                confidences = np.array(
+                    [item['alternatives'][0].get('confidence', 0) for item in words], dtype=np.float64
+                )
+                formatted_transcription['segments'] = [
+                    {'text': text, 'start_time': start, 'end_time': end, 'confidence': confidence}
+                    for text, start, end, confidence in zip(
+                        texts, start_times.tolist(), end_times.tolist(), confidences.tolist()
+                    )
+                ]
             
             # Add speaker labels if available
             if 'speaker_labels' in transcript_data['results']:
@@ -359,6 +672,23 @@ class VideoInsightsClient:
         self.api_key = api_key  # Store for direct API calls
         self.logger = logging.getLogger(__name__)
 
+    def start_upload(self, index_id: str, video_url: str) -> str:
+        """Create an upload task without waiting for indexing; returns the task ID"""
+        self.logger.info(f"Creating upload task for index: {index_id}, video: {video_url}")
+        task = self._call_with_backoff(
+            self.client.task.create,
+            index_id=index_id,
+            url=video_url
+        )
+        self.logger.info(f"Started upload task: {task.id}")
+        return task.id
+    
+    def get_upload_status(self, task_id: str) -> Task:
+        """Fetch the current state of an upload task"""
+        task = self._call_with_backoff(self.client.task.retrieve, id=task_id)
+        self.logger.info(f"Task {task.id} status: {task.status}")
+        return task
+
     def upload_video_and_wait(self, index_id: str, video_url: str, language: str = "en") -> str:
         """Upload video and wait for completion using SDK task monitoring"""
         try:
@@ -401,77 +731,94 @@ class VideoInsightsClient:
             raise
     
     
+    def _call_with_backoff(self, func, **kwargs):
+        """
+        Call a Twelve Labs SDK method, retrying throttling, server errors and
+        dropped connections with jittered backoff.
+        
+        The SDK keeps one pooled keep-alive httpx client per TwelveLabs instance,
+        which outlives warm invocations; a pooled connection the server has
+        since closed surfaces as APIConnectionError and is safe to retry.
+        Timeouts are not retried, as the SDK already waits up to 10 minutes.
+        """
+        for attempt in range(INSIGHTS_MAX_ATTEMPTS):
+            try:
+                return func(**kwargs)
+            except twelvelabs.APITimeoutError:
+                raise
+            except (twelvelabs.APIStatusError, twelvelabs.APIConnectionError) as e:
+                status_code = getattr(e, 'status_code', None)
+                retryable = status_code is None or status_code == 429 or status_code >= 500
+                if not retryable or attempt == INSIGHTS_MAX_ATTEMPTS - 1:
+                    raise
+                delay = min(2 ** attempt, 16) * (0.5 + random.random() * 0.5)
+                reason = status_code or type(e).__name__
+                self.logger.warning(f"Twelve Labs call failed ({reason}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+    
     def generate_comprehensive_insights(self, video_id: str, index_id: str) -> Dict[str, Any]:
-        """Generate comprehensive insights using SDK methods"""
+        """Generate comprehensive insights using SDK methods, with all requests in flight at once"""
         insights = {}
         
+        # One independent summarize/analyze request per insight
+        requests_by_key = {
+            'summary': (self.client.summarize, {
+                'type': "summary",
+                'prompt': "Provide a comprehensive content analysis including entity visibility, emotional impact, key messages, and content themes"
+            }),
+            'chapters': (self.client.summarize, {'type': "chapter"}),
+            'highlights': (self.client.summarize, {
+                'type': "highlight",
+                'prompt': "Identify key moments, important reveals, emotional peaks, and significant segments"
+            }),
+            'topics': (self.client.analyze, {
+                'prompt': "List the main topics, themes, and key concepts discussed in this video"
+            }),
+            'hashtags': (self.client.analyze, {
+                'prompt': "Generate relevant hashtags for social media based on video content"
+            }),
+            'sentiment_analysis': (self.client.analyze, {
+                'prompt': "Analyze the overall sentiment and emotional tone of this video. Include percentage breakdowns of positive, negative, and neutral content."
+            }),
+            'content_analytics': (self.client.analyze, {
+                'prompt': "Extract key content analytics: entity mentions count, important moments, topic coverage duration, and engagement indicators"
+            }),
+        }
+        
+        executor = ThreadPoolExecutor(max_workers=len(requests_by_key))
         try:
+            futures = {
+                executor.submit(self._call_with_backoff, func, video_id=video_id, **kwargs): key
+                for key, (func, kwargs) in requests_by_key.items()
+            }
             
-            # Generate summary using SDK
-            summary_result = self.client.summarize(
-                video_id=video_id,
-                type="summary",
-                prompt="Provide a comprehensive content analysis including entity visibility, emotional impact, key messages, and content themes"
-            )
-            insights['summary'] = summary_result.summary
-            
-            # Generate chapters using SDK
-            chapters_result = self.client.summarize(
-                video_id=video_id,
-                type="chapter"
-            )
-            insights['chapters'] = [
-                {
-                    'start': chapter.start,
-                    'end': chapter.end,
-                    'title': chapter.chapter_title,
-                    'summary': getattr(chapter, 'chapter_summary', '')
-                }
-                for chapter in chapters_result.chapters
-            ]
-            
-            # Generate highlights using SDK
-            highlights_result = self.client.summarize(
-                video_id=video_id,
-                type="highlight",
-                prompt="Identify key moments, important reveals, emotional peaks, and significant segments"
-            )
-            insights['highlights'] = [
-                {
-                    'start': highlight.start,
-                    'end': highlight.end,
-                    'highlight': highlight.highlight
-                }
-                for highlight in highlights_result.highlights
-            ]
-            
-            # Generate custom text insights using SDK
-            topics_result = self.client.analyze(
-                video_id=video_id,
-                prompt="List the main topics, themes, and key concepts discussed in this video"
-            )
-            insights['topics'] = topics_result.data
-            
-            # Generate hashtags using SDK
-            hashtags_result = self.client.analyze(
-                video_id=video_id,
-                prompt="Generate relevant hashtags for social media based on video content"
-            )
-            insights['hashtags'] = hashtags_result.data
-            
-            # Generate sentiment analysis
-            sentiment_result = self.client.analyze(
-                video_id=video_id,
-                prompt="Analyze the overall sentiment and emotional tone of this video. Include percentage breakdowns of positive, negative, and neutral content."
-            )
-            insights['sentiment_analysis'] = sentiment_result.data
-            
-            # Extract key content analytics
-            analytics_result = self.client.analyze(
-                video_id=video_id,
-                prompt="Extract key content analytics: entity mentions count, important moments, topic coverage duration, and engagement indicators"
-            )
-            insights['content_analytics'] = analytics_result.data
+            for future in as_completed(futures):
+                key = futures[future]
+                result = future.result()
+                
+                if key == 'summary':
+                    insights['summary'] = result.summary
+                elif key == 'chapters':
+                    insights['chapters'] = [
+                        {
+                            'start': chapter.start,
+                            'end': chapter.end,
+                            'title': chapter.chapter_title,
+                            'summary': getattr(chapter, 'chapter_summary', '')
+                        }
+                        for chapter in result.chapters
+                    ]
+                elif key == 'highlights':
+                    insights['highlights'] = [
+                        {
+                            'start': highlight.start,
+                            'end': highlight.end,
+                            'highlight': highlight.highlight
+                        }
+                        for highlight in result.highlights
+                    ]
+                else:
+                    insights[key] = result.data
             
         except twelvelabs.APIStatusError as e:
             self.logger.error(f"Insights generation failed: {e}")
@@ -479,8 +826,12 @@ class VideoInsightsClient:
         except Exception as e:
             self.logger.error(f"Insights generation error: {e}")
             raise
+        finally:
+            # On failure, drop requests that have not started yet
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        return insights
+        # Keep the original key order for the stored document
+        return {key: insights[key] for key in requests_by_key}
     
     def get_video_embeddings(self, index_id: str, video_id: str) -> List[Dict[str, Any]]:
         """Get video embeddings using SDK"""
@@ -594,14 +945,16 @@ def prepare_content_for_embedding(insights: Dict[str, Any], detections: Dict[str
     
     # 5. Chapter titles and highlights (great for finding specific moments)
     if insights.get('chapters'):
-        chapter_titles = [ch['title'] for ch in insights['chapters'] if ch.get('title')]
+        chapter_titles = ', '.join(ch['title'] for ch in insights['chapters'] if ch.get('title'))
         if chapter_titles:
-            content_parts.append(f"CHAPTERS: {', '.join(chapter_titles)}")
+            content_parts.append(f"CHAPTERS: {chapter_titles}")
     
     if insights.get('highlights'):
-        highlight_texts = [h['highlight'] for h in insights['highlights'] if h.get('highlight')]
+        highlight_texts = ' | '.join(
+            islice((h['highlight'] for h in insights['highlights'] if h.get('highlight')), 5)
+        )  # Top 5 highlights
         if highlight_texts:
-            content_parts.append(f"KEY MOMENTS: {' | '.join(highlight_texts[:5])}")  # Top 5 highlights
+            content_parts.append(f"KEY MOMENTS: {highlight_texts}")
     
     # 6. Brand/company/name mentions from transcription
     if detections.get('entities'):
@@ -621,19 +974,13 @@ def prepare_content_for_embedding(insights: Dict[str, Any], detections: Dict[str
     
     # 7. Legacy logo detection (keeping for backward compatibility)
     if detections.get('logos'):
-        unique_brands = set()
-        for logo in detections['logos']:
-            if logo.get('brand_name'):
-                unique_brands.add(logo['brand_name'])
+        unique_brands = {logo['brand_name'] for logo in detections['logos'] if logo.get('brand_name')}
         if unique_brands:
             content_parts.append(f"BRANDS DETECTED VISUALLY: {', '.join(unique_brands)}")
     
     # 8. Emotional content (for sentiment-based searches)
     if detections.get('emotions'):
-        emotion_types = set()
-        for emotion in detections['emotions']:
-            if emotion.get('type'):
-                emotion_types.add(emotion['type'])
+        emotion_types = {emotion['type'] for emotion in detections['emotions'] if emotion.get('type')}
         if emotion_types:
             content_parts.append(f"EMOTIONS: {', '.join(emotion_types)}")
     
@@ -644,17 +991,53 @@ def prepare_content_for_embedding(insights: Dict[str, Any], detections: Dict[str
     
     # 10. Text overlays (for campaigns with specific text/graphics)
     if detections.get('text_graphics'):
-        text_overlays = [tg['text'] for tg in detections['text_graphics'] if tg.get('text')]
+        text_overlays = ' | '.join(
+            islice((tg['text'] for tg in detections['text_graphics'] if tg.get('text')), 10)
+        )  # Top 10
         if text_overlays:
-            content_parts.append(f"TEXT OVERLAYS: {' | '.join(text_overlays[:10])}")  # Top 10
+            content_parts.append(f"TEXT OVERLAYS: {text_overlays}")
     
     return "\n\n".join(content_parts)
 
 
+def bulk_index_videos(opensearch_client: OpenSearch, docs: List[Dict[str, Any]]) -> Tuple[int, List[Any]]:
+    """
+    Index video documents through the bulk helper.
+    
+    Documents are shipped in 500-document / 100 MB requests, and 429
+    rejections are retried with backoff. OpenSearch Serverless doesn't
+    support custom IDs or immediate refresh, so neither is requested.
+    
+    Returns:
+        (number of documents indexed, per-document errors)
+    """
+    actions = ({'_op_type': 'index', '_index': INDEX_NAME, '_source': doc} for doc in docs)
+    success_count, errors = helpers.bulk(
+        opensearch_client,
+        actions,
+        chunk_size=500,
+        max_chunk_bytes=100 * 1024 * 1024,
+        max_retries=3,
+        initial_backoff=2,
+        request_timeout=120,
+        raise_on_error=False
+    )
+    if errors:
+        logger.error(f"Bulk indexed {success_count} of {len(docs)} videos; errors: {errors}")
+    return success_count, errors
+
+
+@lru_cache(maxsize=1)
 def get_video_insights_client() -> VideoInsightsClient:
-    """Get authenticated Twelve Labs SDK client"""
+    """
+    Get authenticated Twelve Labs SDK client.
+    
+    The API key lookup and client are cached for the lifetime of the Lambda
+    container, so warm invocations skip the Secrets Manager round-trip.
+    Failures are not cached and are retried on the next call.
+    """
     if TWELVE_LABS_API_KEY_SECRET:
-        secrets_client = boto3.client('secretsmanager')
+        secrets_client = get_aws_client('secretsmanager')
         secret = secrets_client.get_secret_value(SecretId=TWELVE_LABS_API_KEY_SECRET)
         secret_data = json.loads(secret['SecretString'])
         api_key = secret_data['api_key']
@@ -684,29 +1067,35 @@ def lambda_extract_insights(event: Dict[str, Any], context: Any) -> Dict[str, An
         cohere_client = CohereEmbeddingClient()
         transcribe_client = TranscribeClient()
         
-        # Start Amazon Transcribe job in parallel with Twelve Labs upload
-        logger.info("Starting Amazon Transcribe job")
-        transcribe_job_name = transcribe_client.start_transcription_job(
-            video_url=video_url,
-            s3_bucket=event['s3_bucket'],
-            s3_key=event['s3_key']
-        )
-        
-        # Upload video and wait for completion using SDK
-        video_id = video_insights_client.upload_video_and_wait(index_id, video_url)
-        
-        # Extract all insights using SDK
-        insights = video_insights_client.generate_comprehensive_insights(video_id, index_id)
-        embeddings = video_insights_client.get_video_embeddings(index_id, video_id)
-        
-        # Wait for and get Amazon Transcribe results
-        logger.info("Waiting for Amazon Transcribe job to complete")
-        transcribe_job = transcribe_client.wait_for_transcription_job(transcribe_job_name)
+        if event.get('video_id') and event.get('transcribe_job_name'):
+            # The state machine already uploaded the video and started Transcribe
+            video_id = event['video_id']
+            transcribe_job_name = event['transcribe_job_name']
+        else:
+            # Start Amazon Transcribe job in parallel with Twelve Labs upload
+            logger.info("Starting Amazon Transcribe job")
+            transcribe_job_name = transcribe_client.start_transcription_job(
+                video_url=video_url,
+                s3_bucket=event['s3_bucket'],
+                s3_key=event['s3_key']
+            )
+            
+            # Upload video and wait for completion using SDK
+            video_id = video_insights_client.upload_video_and_wait(index_id, video_url)
         
-        # Parse transcription results
-        transcription = transcribe_client.parse_transcription_results(
-            transcribe_job['Transcript']['TranscriptFileUri']
-        )
+        # Insights, video embeddings and the Transcribe results don't depend on
+        # each other, so wait on all three at once
+        logger.info("Extracting insights and embeddings while waiting for Amazon Transcribe")
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            insights_future = executor.submit(
+                video_insights_client.generate_comprehensive_insights, video_id, index_id
+            )
+            embeddings_future = executor.submit(video_insights_client.get_video_embeddings, index_id, video_id)
+            transcription_future = executor.submit(transcribe_client.get_transcription, transcribe_job_name)
+            
+            insights = insights_future.result()
+            embeddings = embeddings_future.result()
+            transcription = transcription_future.result()
         
         # Add transcription to insights
         insights['transcription'] = transcription
@@ -718,37 +1107,43 @@ def lambda_extract_insights(event: Dict[str, Any], context: Any) -> Dict[str, An
             video_id, 
             transcription_text=transcription.get('full_text', '')
         )
-        from pprint import pprint
-        pprint(search_results)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Detections: %s", orjson.dumps(search_results, default=str).decode())
         
-        # Calculate average embedding for video_content_embedding field
+        # Calculate average embedding for video_content_embedding field in one
+        # float32 pass; the index keeps it binary-quantized on disk, so float64 buys nothing.
+        # Rows are copied straight into a preallocated matrix rather than letting
+        # NumPy infer shape and dtype from a nested list.
         avg_embedding = None
         if embeddings:
-            all_embeddings = [seg['embedding'] for seg in embeddings]
-            avg_embedding = np.mean(all_embeddings, axis=0).tolist()
+            segment_matrix = np.empty((len(embeddings), len(embeddings[0]['embedding'])), dtype=np.float32)
+            for row, seg in enumerate(embeddings):
+                segment_matrix[row] = seg['embedding']
+            avg_embedding = segment_matrix.mean(axis=0, dtype=np.float32)
         
         # Prepare content for Cohere embedding
         content_for_embedding = prepare_content_for_embedding(insights, search_results)
         
         # Generate Cohere embedding for video content
         logger.info("Generating Cohere embedding for video content")
-        cohere_embeddings = cohere_client.generate_embeddings(
+        cohere_embeddings = cohere_client.generate_embeddings_batched(
             texts=[content_for_embedding],
-            input_type="search_document"  # For indexing
+            input_type="search_document",  # For indexing
+            embedding_type="int8"  # pegasus_insights_embedding is a byte-vector field
         )
         
         # Get the first (and only) embedding
         pegasus_embedding = cohere_embeddings[0] if cohere_embeddings else None
         
         # Verify embedding dimension (should be 1024 for Cohere)
-        if pegasus_embedding and len(pegasus_embedding) != 1024:
+        if pegasus_embedding is not None and len(pegasus_embedding) != 1024:
             logger.warning(f"Unexpected Cohere embedding dimension: {len(pegasus_embedding)}")
         
         # Validate all required data is present
-        if not avg_embedding:
+        if avg_embedding is None:
             raise ValueError("Failed to generate video content embedding - cannot proceed")
         
-        if not pegasus_embedding:
+        if pegasus_embedding is None:
             raise ValueError("Failed to generate Cohere embedding - cannot proceed")
         
         if not insights:
@@ -757,6 +1152,9 @@ def lambda_extract_insights(event: Dict[str, Any], context: Any) -> Dict[str, An
         if not embeddings:
             raise ValueError("No video embeddings were retrieved - cannot proceed")
         
+        # One timestamp for every field, so they agree exactly
+        processed_at = datetime.now(timezone.utc).isoformat()
+        
         # Combine all data matching OpenSearch schema
         video_data = {
             'video_id': video_id,
@@ -765,11 +1163,11 @@ def lambda_extract_insights(event: Dict[str, Any], context: Any) -> Dict[str, An
             's3_bucket': event['s3_bucket'],
             's3_key': event['s3_key'],
             'thumbnail_s3_key': thumbnail_s3_key,
-            'processing_timestamp': datetime.utcnow().isoformat(),
+            'processing_timestamp': processed_at,
             
             # Embeddings
             'video_content_embedding': avg_embedding,  # Twelve Labs visual embedding
-            'pegasus_insights_embedding': pegasus_embedding,  # Cohere text embedding
+            'pegasus_insights_embedding': pegasus_embedding,  # Cohere text embedding (int8)
             'pegasus_content_for_embedding': content_for_embedding,  # The text that was embedded
             
             # Pegasus insights
@@ -782,8 +1180,8 @@ def lambda_extract_insights(event: Dict[str, Any], context: Any) -> Dict[str, An
             'embedding_metadata': {
                 'video_embedding_model': MARENGO_MODEL_ID,
                 'pegasus_embedding_model': COHERE_MODEL_ID,
-                'video_embedding_timestamp': datetime.utcnow().isoformat(),
-                'pegasus_embedding_timestamp': datetime.utcnow().isoformat(),
+                'video_embedding_timestamp': processed_at,
+                'pegasus_embedding_timestamp': processed_at,
                 'video_embeddings_present': len(embeddings) > 0,
                 'pegasus_embeddings_present': pegasus_embedding is not None
             },
@@ -793,44 +1191,43 @@ def lambda_extract_insights(event: Dict[str, Any], context: Any) -> Dict[str, An
         }
         
         # Store raw data in S3 for backup
-        s3_client = boto3.client('s3')
+        s3_client = get_aws_client('s3')
         metadata_key = f"metadata/{video_id}_insights.json"
         
-        # Include raw embeddings in S3 backup but not in OpenSearch
-        backup_data = video_data.copy()
-        backup_data['_raw_video_embeddings'] = embeddings
-        
-        s3_client.put_object(
-            Bucket=event['s3_bucket'],
-            Key=metadata_key,
-            Body=json.dumps(backup_data, indent=2),
-            ContentType='application/json'
+        # Include raw embeddings in S3 backup but not in OpenSearch, packed as
+        # base64 little-endian float16 (2 bytes per value instead of ~20 as JSON text)
+        raw_video_embeddings = {
+            'dtype': 'float16',
+            'shape': list(segment_matrix.shape),
+            'data': base64.b64encode(segment_matrix.astype('<f2').tobytes()).decode('ascii'),
+            'segments': [{key: value for key, value in seg.items() if key != 'embedding'} for seg in embeddings]
+        }
+        backup_body = gzip.compress(
+            orjson.dumps({**video_data, '_raw_video_embeddings': raw_video_embeddings},
+                         option=orjson.OPT_SERIALIZE_NUMPY),
+            compresslevel=6
         )
         
-        # Now index to OpenSearch
-        credentials = boto3.Session().get_credentials()
-        auth = AWSV4SignerAuth(credentials, REGION, 'aoss')
-        
-        # Parse hostname from full OpenSearch endpoint URL
-        opensearch_host = OPENSEARCH_ENDPOINT.replace('https://', '').replace('http://', '')
+        # The S3 backup and the OpenSearch index are independent; write both at once
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            backup_future = executor.submit(
+                s3_client.put_object,
+                Bucket=event['s3_bucket'],
+                Key=metadata_key,
+                Body=backup_body,
+                ContentType='application/json',
+                ContentEncoding='gzip'  # S3 GETs and browsers decompress transparently
+            )
+            index_future = executor.submit(bulk_index_videos, get_opensearch_client(), [video_data])
+            
+            backup_future.result()
+            success_count, bulk_errors = index_future.result()
         
-        opensearch_client = OpenSearch(
-            hosts=[{'host': opensearch_host, 'port': 443}],
-            http_auth=auth,
-            use_ssl=True,
-            verify_certs=True,
-            connection_class=RequestsHttpConnection
-        )
-        
-        # Index the document (OpenSearch Serverless doesn't support custom IDs or immediate refresh)
-        opensearch_response = opensearch_client.index(
-            index=INDEX_NAME,
-            body=video_data
-        )
+        if success_count != 1:
+            raise RuntimeError(f"Failed to index video {video_id} to OpenSearch: {bulk_errors}")
         
         logger.info(f"Successfully indexed video {video_id} to OpenSearch")
         
-        # Log the response structure for debugging
         response = {
             'statusCode': 200,
             'body': {
@@ -841,12 +1238,14 @@ def lambda_extract_insights(event: Dict[str, Any], context: Any) -> Dict[str, An
                 'has_video_embeddings': len(embeddings) > 0,
                 'has_transcription': 'transcription' in insights,
                 'has_cohere_embedding': pegasus_embedding is not None,
-                'opensearch_indexed': opensearch_response['result'] == 'created' or opensearch_response['result'] == 'updated',
+                'opensearch_indexed': success_count == 1,
                 'content_for_embedding_length': len(content_for_embedding)
             }
         }
         
-        logger.info(f"Lambda response structure: {json.dumps(response, default=str)}")
+        # Log the response structure for debugging
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Lambda response structure: %s", orjson.dumps(response, default=str).decode())
         return response
         
     except Exception as e:
@@ -855,9 +1254,67 @@ def lambda_extract_insights(event: Dict[str, Any], context: Any) -> Dict[str, An
         # This will trigger the Catch block and go to HandleProcessingError
         raise
 
+def lambda_upload_video(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Start or check the Twelve Labs upload without blocking on indexing.
+    
+    The first call starts the Transcribe job and the upload task; the state
+    machine then waits and calls again with the returned body until the
+    upload is ready, so no Lambda is billed while Twelve Labs indexes.
+    """
+    try:
+        video_insights_client = get_video_insights_client()
+        
+        if not event.get('twelve_labs_task_id'):
+            logger.info("Starting Amazon Transcribe job")
+            transcribe_job_name = TranscribeClient().start_transcription_job(
+                video_url=event['video_url'],
+                s3_bucket=event['s3_bucket'],
+                s3_key=event['s3_key']
+            )
+            task_id = video_insights_client.start_upload(event['twelve_labs_index_id'], event['video_url'])
+            return {
+                'statusCode': 200,
+                'body': {
+                    **event,
+                    'twelve_labs_task_id': task_id,
+                    'transcribe_job_name': transcribe_job_name,
+                    'upload_status': 'pending',
+                    'upload_polls': 0
+                }
+            }
+        
+        task = video_insights_client.get_upload_status(event['twelve_labs_task_id'])
+        polls = event.get('upload_polls', 0) + 1
+        if task.status == 'failed':
+            raise Exception(f"Video processing failed with status: {task.status}")
+        if task.status != 'ready' and polls >= UPLOAD_MAX_POLLS:
+            raise TimeoutError(f"Upload task {task.id} not ready after {polls} status checks")
+        
+        return {
+            'statusCode': 200,
+            'body': {
+                **event,
+                'video_id': task.video_id,
+                'upload_status': task.status,
+                'upload_polls': polls
+            }
+        }
+        
+    except Exception as e:
+        logger.error(f"Error uploading video: {str(e)}")
+        raise
+
 # Main handler function for AWS Lambda
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Main Lambda handler - entry point for AWS Lambda
     """
-    return lambda_extract_insights(event, context)
\ No newline at end of file
+    return lambda_extract_insights(event, context)
+
+
+def upload_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda entry point for the non-blocking upload steps of the state machine
+    """
+    return lambda_upload_video(event, context)
\ No newline at end of file
@@ -1,8 +1,10 @@
 import json
 import boto3
 import os
-from typing import Dict, Any, List, Optional
+import time
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
 import logging
 
 # Import Twelve Labs SDK
@@ -28,6 +30,13 @@ TWELVE_LABS_API_KEY_SECRET = os.environ.get('TWELVE_LABS_API_KEY_SECRET')
 OPENSEARCH_ENDPOINT = os.environ.get('OPENSEARCH_ENDPOINT')
 INDEX_NAME = os.environ.get('INDEX_NAME', 'video-insights-rag')
 REGION = os.environ.get('REGION', 'us-east-1')
+TWELVE_LABS_INDEX_ID_SECRET = "twelve-labs-index-id"
+# Seconds a resolved index ID is trusted before checking it still exists
+INDEX_ID_RECHECK_SECONDS = int(os.environ.get('INDEX_ID_RECHECK_SECONDS', '300'))
+
+# Twelve Labs index IDs resolved by this container, keyed by index name,
+# with the time each was last confirmed to exist
+_index_ids: Dict[str, Tuple[str, float]] = {}
 
 @dataclass
 class VideoProcessingConfig:
@@ -79,12 +88,25 @@ class TwelveLabsSDKClient:
         except twelvelabs.APIStatusError as e:
             self.logger.error(f"Index creation failed: {e}")
             raise
+    
+    def index_exists(self, index_id: str) -> bool:
+        """Check that a previously resolved index has not been deleted"""
+        try:
+            self.client.index.retrieve(index_id)
+            return True
+        except twelvelabs.NotFoundError:
+            return False
+
+@lru_cache(maxsize=1)
+def get_secrets_client():
+    """Shared Secrets Manager client (boto3 clients are thread-safe)"""
+    return boto3.client('secretsmanager')
 
+@lru_cache(maxsize=1)
 def get_twelve_labs_client() -> TwelveLabsSDKClient:
-    """Get authenticated Twelve Labs SDK client"""
+    """Get authenticated Twelve Labs SDK client (the API key is fetched once per container)"""
     if TWELVE_LABS_API_KEY_SECRET:
-        secrets_client = boto3.client('secretsmanager')
-        secret = secrets_client.get_secret_value(SecretId=TWELVE_LABS_API_KEY_SECRET)
+        secret = get_secrets_client().get_secret_value(SecretId=TWELVE_LABS_API_KEY_SECRET)
         secret_data = json.loads(secret['SecretString'])
         api_key = secret_data['api_key']
     else:
@@ -129,24 +151,39 @@ def check_opensearch_index() -> bool:
         logger.error(f"Failed to check OpenSearch index: {str(e)}")
         return False
 
-def store_twelve_labs_index_id(index_id: str) -> None:
+def load_twelve_labs_index_id(index_name: str) -> Optional[str]:
+    """Read the stored Twelve Labs index ID back from Secrets Manager if it belongs to index_name"""
+    try:
+        secret = get_secrets_client().get_secret_value(SecretId=TWELVE_LABS_INDEX_ID_SECRET)
+        secret_data = json.loads(secret['SecretString'])
+    except Exception as e:
+        logger.info(f"No stored Twelve Labs index ID available: {str(e)}")
+        return None
+    
+    # Secrets written before the index name was recorded are treated as a miss
+    if secret_data.get('index_name') != index_name:
+        return None
+    return secret_data.get('index_id')
+
+def store_twelve_labs_index_id(index_id: str, index_name: str) -> None:
     """Store the Twelve Labs index ID in AWS Secrets Manager for other components to access"""
     try:
-        secrets_client = boto3.client('secretsmanager')
-        secret_name = "twelve-labs-index-id"
+        secrets_client = get_secrets_client()
+        secret_name = TWELVE_LABS_INDEX_ID_SECRET
+        secret_string = json.dumps({"index_id": index_id, "index_name": index_name})
         
         # Try to update existing secret first
         try:
             secrets_client.update_secret(
                 SecretId=secret_name,
-                SecretString=json.dumps({"index_id": index_id})
+                SecretString=secret_string
             )
             logger.info(f"Updated Twelve Labs index ID in Secrets Manager: {index_id}")
         except secrets_client.exceptions.ResourceNotFoundException:
             # Secret doesn't exist, create it
             secrets_client.create_secret(
                 Name=secret_name,
-                SecretString=json.dumps({"index_id": index_id}),
+                SecretString=secret_string,
                 Description="Twelve Labs index ID for video processing"
             )
             logger.info(f"Created Twelve Labs index ID secret in Secrets Manager: {index_id}")
@@ -156,6 +193,35 @@ def store_twelve_labs_index_id(index_id: str) -> None:
         # Don't fail the entire process if secret storage fails
         # The processing can continue, but other components might need manual configuration
 
+def resolve_twelve_labs_index_id(index_name: str) -> str:
+    """
+    Return the Twelve Labs index ID for index_name.
+    
+    Reuses the ID resolved earlier by this container or stored in Secrets
+    Manager, and only lists/creates indexes through the SDK on a miss. A reused
+    ID is checked against Twelve Labs every INDEX_ID_RECHECK_SECONDS; if the
+    index has been deleted, the cached ID is dropped, the index is resolved
+    again and the secret is overwritten with the new ID.
+    """
+    cached = _index_ids.get(index_name)
+    if cached and time.time() - cached[1] < INDEX_ID_RECHECK_SECONDS:
+        return cached[0]
+    
+    twelve_labs = get_twelve_labs_client()
+    index_id = cached[0] if cached else load_twelve_labs_index_id(index_name)
+    if index_id and not twelve_labs.index_exists(index_id):
+        logger.warning(f"Twelve Labs index {index_id} no longer exists, resolving '{index_name}' again")
+        _index_ids.pop(index_name, None)
+        index_id = None
+    
+    if not index_id:
+        index_id = twelve_labs.create_index_if_needed(index_name, VideoProcessingConfig())
+        # Store the index ID in AWS Secrets Manager for other components to use
+        store_twelve_labs_index_id(index_id, index_name)
+    
+    _index_ids[index_name] = (index_id, time.time())
+    return index_id
+
 # Lambda handler for initiating video processing
 def lambda_initiate_processing(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
@@ -192,17 +258,10 @@ def lambda_initiate_processing(event: Dict[str, Any], context: Any) -> Dict[str,
             ExpiresIn=3600 * 6  # 6 hours
         )
         
-        # Initialize Twelve Labs SDK client
-        twelve_labs = get_twelve_labs_client()
-        config = VideoProcessingConfig()
-        
-        # Create or get Twelve Labs index using SDK
         # Get index name from environment or use a default
         index_name = os.getenv('DEFAULT_INDEX_NAME', 'video_library_index')
-        index_id = twelve_labs.create_index_if_needed(index_name, config)
         
-        # Store the index ID in AWS Secrets Manager for other components to use
-        store_twelve_labs_index_id(index_id)
+        index_id = resolve_twelve_labs_index_id(index_name)
         
         # Generate thumbnail if ThumbnailGenerator is available
         thumbnail_s3_key = None
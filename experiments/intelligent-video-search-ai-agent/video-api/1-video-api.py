@@ -4,13 +4,20 @@ Standalone Video API for thumbnail carousel
 Direct OpenSearch access for fast video library browsing
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 import boto3
+from botocore.config import Config
 from dotenv import load_dotenv
 import os
+import time
+import hashlib
 from opensearchpy import OpenSearch, RequestsHttpConnection, AWSV4SignerAuth
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from functools import lru_cache
 import logging
 
 # Set up logging
@@ -24,6 +31,8 @@ load_dotenv()
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
 OPENSEARCH_ENDPOINT = os.getenv("OPENSEARCH_ENDPOINT")
 INDEX_NAME = os.getenv("INDEX_NAME", "video-insights-rag")
+# Lifetime of presigned video/thumbnail URLs; each URL is reused for half of it
+PRESIGNED_URL_TTL = int(os.getenv("PRESIGNED_URL_TTL", "3600"))
 
 # Validate required environment variables
 if not OPENSEARCH_ENDPOINT:
@@ -33,7 +42,8 @@ if not OPENSEARCH_ENDPOINT:
 app = FastAPI(
     title="Video Library API",
     description="Standalone API for video thumbnails and library management",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -50,7 +60,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize OpenSearch client
+# Compress larger responses (the /videos listing is mostly repetitive JSON text)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# Initialize OpenSearch client once and share its connection pool across requests
+@lru_cache(maxsize=1)
 def get_opensearch_client():
     credentials = boto3.Session().get_credentials()
     auth = AWSV4SignerAuth(credentials, AWS_REGION, 'aoss')
@@ -63,9 +77,43 @@ def get_opensearch_client():
         http_auth=auth,
         use_ssl=True,
         verify_certs=True,
-        connection_class=RequestsHttpConnection
+        connection_class=RequestsHttpConnection,
+        pool_maxsize=32,  # keep-alive connections shared by concurrent requests
+        http_compress=True,  # /videos/{video_id} returns whole documents
+        timeout=30,
+        max_retries=3,
+        retry_on_timeout=True
+    )
+
+@lru_cache(maxsize=1)
+def get_s3_client():
+    """Shared S3 client for presigning; boto3 clients are thread-safe"""
+    return boto3.client('s3', config=Config(signature_version='s3v4'))
+
+def presign_get_url(bucket: str, key: str, expires_in: int = PRESIGNED_URL_TTL) -> str:
+    """Presigned GET URL for an S3 object (signed locally, no network call)"""
+    return get_s3_client().generate_presigned_url(
+        'get_object',
+        Params={'Bucket': bucket, 'Key': key},
+        ExpiresIn=expires_in
     )
 
+@lru_cache(maxsize=4096)
+def _presign_for_window(bucket: str, key: str, window: int) -> str:
+    return presign_get_url(bucket, key)
+
+def current_presign_window() -> int:
+    """Index of the current half-TTL window; presigned URLs are stable within one"""
+    return int(time.time() // (PRESIGNED_URL_TTL // 2))
+
+def cached_presign_get_url(bucket: str, key: str) -> str:
+    """
+    Presigned GET URL reused for half its lifetime, so every URL handed out stays
+    valid for at least PRESIGNED_URL_TTL / 2 seconds. Repeated carousel polls skip
+    re-signing and return identical URLs, which browsers can cache.
+    """
+    return _presign_for_window(bucket, key, current_presign_window())
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -88,7 +136,8 @@ async def health_check():
         # Test connection with a simple query
         response = client.search(
             index=INDEX_NAME,
-            body={"query": {"match_all": {}}, "size": 0}
+            body={"query": {"match_all": {}}, "size": 0},
+            filter_path=["hits.total"]
         )
         
         total_videos = response['hits']['total']['value']
@@ -110,26 +159,43 @@ async def health_check():
         }
 
 @app.get("/videos")
-async def get_all_videos(limit: int = 20):
+async def get_all_videos(request: Request, response: Response, limit: int = 20, after: Optional[str] = None):
     """
     Get all videos with thumbnails for carousel display
     
     Args:
         limit: Maximum number of videos to return (default: 20)
+        after: Cursor from a previous page's next_after, to fetch the following page
     
     Returns:
-        List of videos with thumbnail URLs and metadata
+        List of videos with thumbnail URLs and metadata, or 304 Not Modified when
+        the client's If-None-Match still matches the library's ETag
     """
+    # Cursor is "<processing_timestamp epoch millis>,<video_id>" of the last video seen
+    search_after = None
+    if after:
+        timestamp, _, last_video_id = after.partition(",")
+        try:
+            search_after = [int(timestamp), last_video_id]
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid pagination cursor: {after}")
+    
     try:
         client = get_opensearch_client()
         
-        # Query for all videos, sorted by newest first
+        # Query for all videos, sorted by newest first (video_id breaks ties so
+        # search_after pages are stable). Total hits aren't counted, which lets
+        # shards stop once they have the top `limit` documents.
         query = {
             "size": limit,
+            "track_total_hits": False,
             "query": {
                 "match_all": {}
             },
-            "sort": [{"processing_timestamp": {"order": "desc"}}],
+            "sort": [
+                {"processing_timestamp": {"order": "desc"}},
+                {"video_id": {"order": "asc"}}
+            ],
             "_source": [
                 "video_id", 
                 "video_title", 
@@ -143,23 +209,57 @@ async def get_all_videos(limit: int = 20):
                 "s3_key"
             ]
         }
+        if search_after:
+            query["search_after"] = search_after
+        
+        # The listing only changes when a video is added or removed (or the presigned
+        # URLs roll over), so a count + max watermark identifies it for the ETag.
+        # Both searches go in one _msearch round trip, run off the event loop.
+        # Shard/score metadata is stripped; only sources and sort values are used.
+        watermark, results = (await run_in_threadpool(
+            client.msearch,
+            index=INDEX_NAME,
+            body=[
+                {},
+                {"size": 0, "aggs": {"latest": {"max": {"field": "processing_timestamp"}}}},
+                {},
+                query
+            ],
+            # status keeps every response in the list even when it has no hits
+            filter_path=[
+                "responses.status",
+                "responses.error",
+                "responses.hits.total",
+                "responses.aggregations",
+                "responses.hits.hits._source",
+                "responses.hits.hits.sort"
+            ]
+        ))["responses"]
+        for item in (watermark, results):
+            if "error" in item:
+                raise RuntimeError(item["error"])
+        
+        latest = watermark.get("aggregations", {}).get("latest", {}).get("value")
+        count = watermark.get("hits", {}).get("total", {}).get("value")
+        etag_key = f"{latest}:{count}:{limit}:{after}:{current_presign_window()}"
+        etag = f'"{hashlib.md5(etag_key.encode()).hexdigest()}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "max-age=5"
         
-        response = client.search(index=INDEX_NAME, body=query)
         videos = []
         
-        for hit in response["hits"]["hits"]:
+        # filter_path drops hits entirely when nothing matched
+        hits = results.get("hits", {}).get("hits", [])
+        for hit in hits:
             source = hit["_source"]
             
             # Generate presigned URL for video if needed
             video_url = None
             if source.get("s3_bucket") and source.get("s3_key"):
                 try:
-                    s3_client = boto3.client('s3')
-                    video_url = s3_client.generate_presigned_url(
-                        'get_object',
-                        Params={'Bucket': source["s3_bucket"], 'Key': source["s3_key"]},
-                        ExpiresIn=3600  # 1 hour
-                    )
+                    video_url = cached_presign_get_url(source["s3_bucket"], source["s3_key"])
                 except Exception as e:
                     logger.warning(f"Could not generate presigned URL for video {source.get('video_id')}: {e}")
             
@@ -167,12 +267,7 @@ async def get_all_videos(limit: int = 20):
             thumbnail_url = None
             if source.get("s3_bucket") and source.get("thumbnail_s3_key"):
                 try:
-                    s3_client = boto3.client('s3')
-                    thumbnail_url = s3_client.generate_presigned_url(
-                        'get_object',
-                        Params={'Bucket': source["s3_bucket"], 'Key': source["thumbnail_s3_key"]},
-                        ExpiresIn=3600  # 1 hour
-                    )
+                    thumbnail_url = cached_presign_get_url(source["s3_bucket"], source["thumbnail_s3_key"])
                 except Exception as e:
                     logger.warning(f"Could not generate presigned URL for thumbnail {source.get('video_id')}: {e}")
             
@@ -191,11 +286,17 @@ async def get_all_videos(limit: int = 20):
             
             videos.append(video)
         
+        # A full page may have more behind it; hand back the cursor for the next one
+        next_after = None
+        if len(hits) == limit:
+            last_timestamp, last_video_id = hits[-1]["sort"]
+            next_after = f"{last_timestamp},{last_video_id}"
+        
         return {
             "success": True,
             "videos": videos,
             "total": len(videos),
-            "total_in_database": response["hits"]["total"]["value"]
+            "next_after": next_after
         }
         
     except Exception as e:
@@ -206,12 +307,13 @@ async def get_all_videos(limit: int = 20):
         )
 
 @app.get("/videos/{video_id}")
-async def get_video_details(video_id: str):
+async def get_video_details(video_id: str, include_embeddings: bool = False):
     """
     Get detailed information for a specific video
     
     Args:
         video_id: The video ID to get details for
+        include_embeddings: Also return the embedding vectors (default: False)
     
     Returns:
         Detailed video information
@@ -219,20 +321,24 @@ async def get_video_details(video_id: str):
     try:
         client = get_opensearch_client()
         
+        # All fields for the detailed view; the vectors are only sent on request
         query = {
+            "size": 1,
             "query": {"term": {"video_id": video_id}},
-            "_source": ["*"]  # Get all fields for detailed view
+            "_source": {"excludes": [] if include_embeddings else ["*_embedding"]}
         }
         
-        response = client.search(index=INDEX_NAME, body=query)
+        response = client.search(index=INDEX_NAME, body=query, filter_path=["hits.hits._source"])
         
-        if response["hits"]["total"]["value"] == 0:
+        # filter_path drops hits entirely when nothing matched
+        hits = response.get("hits", {}).get("hits", [])
+        if not hits:
             raise HTTPException(
                 status_code=404,
                 detail=f"Video with ID {video_id} not found"
             )
         
-        source = response["hits"]["hits"][0]["_source"]
+        source = hits[0]["_source"]
         
         return {
             "success": True,
@@ -8,8 +8,11 @@ It wires together two AWS services:
 
 The loop: Claude → tool_use? → execute code → return result → Claude → final answer.
 
+Claude's reply is streamed (ConverseStream), and each tool call starts running
+as soon as its block finishes streaming — before the rest of the reply arrives.
+
 Requirements:
-    pip install boto3 bedrock-agentcore
+    pip install boto3 bedrock-agentcore cachetools
 
 Usage:
     # Configure AWS credentials (IAM, SSO, or environment variables)
@@ -17,14 +20,71 @@ Usage:
 """
 
 import boto3
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
+from botocore.exceptions import ConnectionClosedError
+from cachetools import TTLCache
 
 # --- Configuration ---
 REGION = "us-west-2"
 MODEL_ID = "global.anthropic.claude-sonnet-4-6"
 
+# Bedrock latency-optimized inference ("optimized") cuts time-to-first-token,
+# but only on the models and regions that support it — keep "standard" otherwise
+LATENCY = "standard"
+
+# Upper bound on model turns per prompt, so a model that keeps requesting tools
+# can't run up unbounded latency and cost. The last turn must answer in text.
+MAX_STEPS = 8
+FINAL_ANSWER_PROMPT = "Step limit reached. Give your final answer now without running more code."
+
+# Code whose first line is this marker is treated as pure (no side effects on the
+# sandbox session), so its output can be reused for up to CACHE_TTL_SECONDS
+PURE_MARKER = "# pure"
+CACHE_TTL_SECONDS = 300
+
+# Keep-alive connections and a larger pool, so every round-trip in the
+# agentic loop reuses a warm TLS connection instead of opening a new one
+BOTO_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={"mode": "adaptive", "max_attempts": 5},
+    read_timeout=600,
+)
+
+# executeCode runs code in a stateful sandbox and is not idempotent, so the code
+# interpreter client never lets botocore re-send a request (it would after a
+# read timeout); call_with_fresh_connection covers a dropped idle connection
+AGENTCORE_CONFIG = BOTO_CONFIG.merge(Config(retries={"mode": "adaptive", "max_attempts": 1}))
+
 # --- AWS Clients ---
-bedrock = boto3.client("bedrock-runtime", region_name=REGION)
-agentcore = boto3.client("bedrock-agentcore", region_name=REGION)
+bedrock = boto3.client("bedrock-runtime", region_name=REGION, config=BOTO_CONFIG)
+agentcore = boto3.client("bedrock-agentcore", region_name=REGION, config=AGENTCORE_CONFIG)
+
+
+def reset_clients():
+    """Replace both clients (and their connection pools) with fresh ones."""
+    global bedrock, agentcore
+    bedrock = boto3.client("bedrock-runtime", region_name=REGION, config=BOTO_CONFIG)
+    agentcore = boto3.client("bedrock-agentcore", region_name=REGION, config=AGENTCORE_CONFIG)
+
+
+def call_with_fresh_connection(call):
+    """
+    Run call(). Pooled keep-alive sockets can be silently dropped by NATs and
+    load balancers while idle; if the call fails because its connection was
+    closed, rebuild the clients and send it once more on a fresh connection.
+    Other errors, read timeouts included, are raised: the code may already be
+    running in the sandbox, and re-sending it could run it twice.
+    """
+    try:
+        return call()
+    except ConnectionClosedError:
+        reset_clients()
+        return call()
+
 
 # --- Tool definition for Claude ---
 tool_config = {
@@ -34,7 +94,9 @@ tool_config = {
             "description": (
                 "Execute Python code in a secure sandbox. "
                 "Use this for calculations, data analysis, or to verify results. "
-                "Common libraries like numpy, pandas, and matplotlib are available."
+                "Common libraries like numpy, pandas, and matplotlib are available. "
+                "Start the code with a `# pure` line if it only reads and prints "
+                "(defines or changes nothing); its output may then be reused."
             ),
             "inputSchema": {
                 "json": {
@@ -49,85 +111,205 @@ tool_config = {
                 }
             }
         }
+    }, {
+        # Prompt caching: everything above this point (the tool schema) is cached
+        "cachePoint": {"type": "default"}
     }]
 }
 
 
+# Outputs of pure code already run in each session, keyed by a hash of the code.
+# Claude often regenerates an identical snippet; reusing its output skips a
+# sandbox round-trip. The session keeps state between calls, so only code marked
+# with PURE_MARKER is cached, and entries expire because a caller may reuse one
+# session across many prompts. Scoped per session because sandbox state differs.
+tool_cache = {}
+
+
 def execute_code(code: str, session_id: str) -> str:
-    """Execute code via AgentCore and return the output."""
-    response = agentcore.invoke_code_interpreter(
+    """Execute code via AgentCore and return the output (reused if pure and cached)."""
+    pure = code.lstrip().startswith(PURE_MARKER)
+    if pure:
+        session_cache = tool_cache.setdefault(
+            session_id, TTLCache(maxsize=128, ttl=CACHE_TTL_SECONDS)
+        )
+        key = hashlib.sha256(code.encode()).hexdigest()
+        cached = session_cache.get(key)
+        if cached is not None:
+            print("[Tool cache hit]")
+            return f"(cached: this code was not re-run)\n{cached}"
+        print("[Tool cache miss]")
+
+    response = call_with_fresh_connection(lambda: agentcore.invoke_code_interpreter(
         codeInterpreterIdentifier="aws.codeinterpreter.v1",
         sessionId=session_id,
         name="executeCode",
         arguments={"language": "python", "code": code}
+    ))
+    # Join text chunks straight off the event stream
+    output = "\n".join(
+        item["text"]
+        for event in response["stream"]
+        for item in event.get("result", {}).get("content", ())
+        if item.get("type") == "text"
+    )
+    if pure:
+        session_cache[key] = output
+    return output
+
+
+def run_tool(tool: dict, session_id: str) -> dict:
+    """Execute one toolUse block and wrap the output as a toolResult."""
+    print(f"[Executing code...]")
+    try:
+        result = execute_code(tool["input"]["code"], session_id)
+        print(f"[Code output: {result[:100]}...]")
+        return {
+            "toolResult": {
+                "toolUseId": tool["toolUseId"],
+                "content": [{"text": result}],
+                "status": "success"
+            }
+        }
+    except Exception as e:
+        return {
+            "toolResult": {
+                "toolUseId": tool["toolUseId"],
+                "content": [{"text": str(e)}],
+                "status": "error"
+            }
+        }
+
+
+def with_cache_point(messages: list) -> list:
+    """
+    Copy of the conversation with a cache point after the newest message, so the
+    next turn reads the whole prior conversation from the prompt cache instead of
+    re-processing it. Only the newest message is marked; history is not modified.
+    """
+    last = messages[-1]
+    return messages[:-1] + [
+        {**last, "content": last["content"] + [{"cachePoint": {"type": "default"}}]}
+    ]
+
+
+def stream_turn(messages: list, session_id: str, pool: ThreadPoolExecutor):
+    """
+    Stream one Claude turn via ConverseStream. Each toolUse block is submitted
+    to the pool the moment it completes, so code runs while Claude keeps generating.
+    With pool=None, tool blocks are assembled but not run.
+
+    Returns the assembled assistant message, the stop reason, and the tool futures.
+    """
+    response = bedrock.converse_stream(
+        modelId=MODEL_ID,
+        messages=with_cache_point(messages),
+        toolConfig=tool_config,
+        inferenceConfig={"maxTokens": 4096},
+        performanceConfig={"latency": LATENCY}
     )
-    parts = []
+
+    blocks = {}  # contentBlockIndex -> content block being assembled
+    futures = []
+    stop_reason = None
     for event in response["stream"]:
-        if "result" in event:
-            for item in event["result"].get("content", []):
-                if item["type"] == "text":
-                    parts.append(item["text"])
-    return "\n".join(parts)
+        if "contentBlockStart" in event:
+            start = event["contentBlockStart"]
+            tool = start["start"].get("toolUse")
+            if tool:
+                blocks[start["contentBlockIndex"]] = {"toolUse": {
+                    "toolUseId": tool["toolUseId"], "name": tool["name"], "input": ""
+                }}
+        elif "contentBlockDelta" in event:
+            index = event["contentBlockDelta"]["contentBlockIndex"]
+            delta = event["contentBlockDelta"]["delta"]
+            if "text" in delta:
+                blocks.setdefault(index, {"text": ""})["text"] += delta["text"]
+            elif "toolUse" in delta:
+                blocks[index]["toolUse"]["input"] += delta["toolUse"]["input"]
+        elif "contentBlockStop" in event:
+            block = blocks.get(event["contentBlockStop"]["contentBlockIndex"], {})
+            if "toolUse" in block:
+                # Tool input arrives as JSON fragments; parse once the block is complete
+                tool = block["toolUse"]
+                tool["input"] = json.loads(tool["input"] or "{}")
+                if pool is not None:
+                    futures.append(pool.submit(run_tool, tool, session_id))
+        elif "messageStop" in event:
+            stop_reason = event["messageStop"]["stopReason"]
 
+    assistant_msg = {"role": "assistant", "content": [blocks[i] for i in sorted(blocks)]}
+    return assistant_msg, stop_reason, futures
 
-def converse_with_code_execution(user_message: str) -> str:
-    """Full agentic loop: Converse API + AgentCore Code Interpreter."""
 
-    # Start a code interpreter session
+def start_session() -> str:
+    """Start a code interpreter session and return its ID."""
     session = agentcore.start_code_interpreter_session(
         codeInterpreterIdentifier="aws.codeinterpreter.v1",
         name="converse-session",
         sessionTimeoutSeconds=900
     )
-    session_id = session["sessionId"]
-    print(f"[Session started: {session_id}]")
+    print(f"[Session started: {session['sessionId']}]")
+    return session["sessionId"]
+
+
+def stop_session(session_id: str):
+    """Stop a code interpreter session and drop its cached tool outputs."""
+    tool_cache.pop(session_id, None)
+    agentcore.stop_code_interpreter_session(
+        codeInterpreterIdentifier="aws.codeinterpreter.v1",
+        sessionId=session_id
+    )
+    print(f"[Session stopped: {session_id}]")
+
+
+def converse_with_code_execution(user_message: str, session_id: str = None,
+                                max_steps: int = MAX_STEPS) -> str:
+    """
+    Full agentic loop: Converse API + AgentCore Code Interpreter.
+
+    Pass a session_id started ahead of time (e.g. a server keeping a few warm
+    sessions) to skip the session start round-trip; the caller then owns that
+    session and must stop it. Otherwise a session is started and stopped here.
+
+    After max_steps model turns Claude is asked for a final answer and no more
+    tools run, which bounds the worst-case latency of a single prompt.
+    """
+    owns_session = session_id is None
+    if owns_session:
+        session_id = start_session()
 
     messages = [{"role": "user", "content": [{"text": user_message}]}]
 
     try:
-        while True:
-            # Step 1: Call Claude via Converse API
-            response = bedrock.converse(
-                modelId=MODEL_ID,
-                messages=messages,
-                toolConfig=tool_config,
-                inferenceConfig={"maxTokens": 4096}
-            )
-
-            assistant_msg = response["output"]["message"]
-            messages.append(assistant_msg)
-
-            # Step 2: If Claude is done (no tool request), return the answer
-            if response["stopReason"] != "tool_use":
-                break
-
-            # Step 3: Execute any requested tools
-            tool_results = []
-            for block in assistant_msg["content"]:
-                if "toolUse" in block:
-                    tool = block["toolUse"]
-                    print(f"[Executing code...]")
-                    try:
-                        result = execute_code(tool["input"]["code"], session_id)
-                        print(f"[Code output: {result[:100]}...]")
-                        tool_results.append({
-                            "toolResult": {
-                                "toolUseId": tool["toolUseId"],
-                                "content": [{"text": result}],
-                                "status": "success"
-                            }
-                        })
-                    except Exception as e:
-                        tool_results.append({
-                            "toolResult": {
-                                "toolUseId": tool["toolUseId"],
-                                "content": [{"text": str(e)}],
-                                "status": "error"
-                            }
-                        })
-
-            # Step 4: Send tool results back to Claude and loop
-            messages.append({"role": "user", "content": tool_results})
+        # One worker: the sandbox session is stateful and handles one call at a
+        # time, so tool calls run in the order Claude issued them (a later block
+        # may use names an earlier one defined). They still overlap with streaming.
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            for _ in range(max_steps):
+                # Step 1: Stream Claude's reply via ConverseStream; requested tools
+                # start executing while the reply is still streaming
+                assistant_msg, stop_reason, pending = stream_turn(
+                    messages, session_id, pool
+                )
+                messages.append(assistant_msg)
+
+                # Step 2: If Claude is done (no tool request), return the answer
+                if stop_reason != "tool_use":
+                    break
+
+                # Step 3: Wait for the requested tools (in the order Claude asked)
+                tool_results = [future.result() for future in pending]
+
+                # Step 4: Send tool results back to Claude and loop
+                messages.append({"role": "user", "content": tool_results})
+            else:
+                # Step limit reached: one last turn for the answer. Converse can't
+                # disable tools once they're in the conversation, so ask in text
+                # and don't run anything Claude still requests.
+                messages[-1]["content"].append({"text": FINAL_ANSWER_PROMPT})
+                assistant_msg, _, _ = stream_turn(messages, session_id, pool=None)
+                messages.append(assistant_msg)
 
         # Extract final text response
         return "\n".join(
@@ -135,12 +317,9 @@ def converse_with_code_execution(user_message: str) -> str:
         )
 
     finally:
-        # Always clean up the session
-        agentcore.stop_code_interpreter_session(
-            codeInterpreterIdentifier="aws.codeinterpreter.v1",
-            sessionId=session_id
-        )
-        print(f"[Session stopped: {session_id}]")
+        # Always clean up a session started here
+        if owns_session:
+            stop_session(session_id)
 
 
 # --- Run ---
@@ -15,14 +15,32 @@ Usage:
 
 from bedrock_agentcore.tools.code_interpreter_client import CodeInterpreter
 import json
+import threading
 
 # --- Configuration ---
 REGION = "us-west-2"
 
 
+# CodeInterpreter keeps the active session ID on the instance, so concurrent
+# run_code calls must not share one: each thread gets its own client.
+_thread_clients = threading.local()
+
+
+def get_code_client(region: str) -> CodeInterpreter:
+    """Build the CodeInterpreter (and its boto3 clients) once per thread and region."""
+    clients = getattr(_thread_clients, "clients", None)
+    if clients is None:
+        clients = _thread_clients.clients = {}
+    if region not in clients:
+        clients[region] = CodeInterpreter(region)
+    return clients[region]
+
+
 def run_code(code: str, language: str = "python") -> str:
     """Execute code using the high-level CodeInterpreter API."""
-    code_client = CodeInterpreter(REGION)
+    # Reuse this thread's client across calls — batch pipelines call run_code
+    # repeatedly. Each call still gets its own sandbox session via start()/stop().
+    code_client = get_code_client(REGION)
     code_client.start()
 
     try:
@@ -11,56 +11,84 @@ The sandbox gets IAM credentials from the execution role (no keys needed).
 Claude Code calls Bedrock using those credentials automatically.
 
 Usage:
-    python run.py <code-interpreter-id> "Your prompt here"
+    python run.py <code-interpreter-id> "Your prompt here" [session-id]
 
 Examples:
     python run.py claudeCodePublic-abc123 "Write a Python fibonacci function"
     python run.py claudeCodePublic-abc123 "Explain what quicksort does"
 
+    # Keep the session warm: pass "keep" to leave it running, then pass its ID
+    # to later runs — Node.js + Claude Code are already installed there
+    python run.py claudeCodePublic-abc123 "Write hello world" keep
+    python run.py claudeCodePublic-abc123 "Now add tests" <session-id>
+
 Prerequisites:
     - Run setup_infrastructure.py first (one-time)
     - AWS credentials configured with AgentCore access
 """
 
 import boto3
+import os
 import sys
 from botocore.config import Config
+from functools import lru_cache
 
 # --- Configuration ---
 REGION = "us-west-2"
 MODEL_ID = "global.anthropic.claude-sonnet-4-6"
 
-# Longer timeout — Claude Code may take a while on complex prompts
-BOTO_CONFIG = Config(read_timeout=600, connect_timeout=10)
+# Longer timeout — Claude Code may take a while on complex prompts.
+# Keep-alive connections and a larger pool avoid a fresh TLS handshake per call.
+BOTO_CONFIG = Config(
+    read_timeout=600,
+    connect_timeout=10,
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={"mode": "adaptive", "max_attempts": 5},
+)
 
 # Node.js version to install in the sandbox
 NODE_VERSION = "v22.16.0"
 
+# Optional: URL (e.g. an S3 presigned URL) of a prebuilt tar.gz of the sandbox's
+# /tmp/claude-code/node tree. One download + extract replaces the Node.js download
+# and npm install on fresh sessions. See README.md for how to build it.
+BUNDLE_URL = os.environ.get("CLAUDE_CODE_BUNDLE_URL", "")
+
 # --- Setup code that runs inside the sandbox ---
 INSTALL_CODE = f"""
-import subprocess, os, urllib.request, tarfile, platform
+import subprocess, os, shutil, urllib.request, tarfile, platform
 
 NODE_VERSION = '{NODE_VERSION}'
+BUNDLE_URL = {BUNDLE_URL!r}
 INSTALL_DIR = '/tmp/claude-code'
 NODE_DIR = f'{{INSTALL_DIR}}/node'
 arch = 'arm64' if platform.machine() == 'aarch64' else 'x64'
 
 os.makedirs(INSTALL_DIR, exist_ok=True)
 
+# Prebuilt Node.js + Claude Code bundle (if provided and not already in this session)
+if BUNDLE_URL and not os.path.exists(f'{{NODE_DIR}}/bin/node'):
+    try:
+        print('Downloading prebuilt bundle...')
+        with urllib.request.urlopen(BUNDLE_URL) as r, tarfile.open(fileobj=r, mode='r|gz') as tar:
+            tar.extractall(INSTALL_DIR, filter='data')
+        print('Bundle installed')
+    except Exception as e:
+        print(f'Bundle unavailable ({{e}}), installing from nodejs.org and npm')
+
 # Download and install Node.js (if not already cached in this session)
 if not os.path.exists(f'{{NODE_DIR}}/bin/node'):
     url = f'https://nodejs.org/dist/{{NODE_VERSION}}/node-{{NODE_VERSION}}-linux-{{arch}}.tar.gz'
-    print(f'Downloading Node.js {{NODE_VERSION}}...')
-    urllib.request.urlretrieve(url, '/tmp/node.tar.gz')
-
-    os.makedirs(NODE_DIR, exist_ok=True)
-    print('Extracting...')
-    with tarfile.open('/tmp/node.tar.gz', 'r:gz') as tar:
+    print(f'Downloading and extracting Node.js {{NODE_VERSION}}...')
+    # Extract straight from the HTTP response — no tarball staged on disk
+    with urllib.request.urlopen(url) as r, tarfile.open(fileobj=r, mode='r|gz') as tar:
         tar.extractall('/tmp/node-extract', filter='data')
 
+    # Move the extracted tree into place (a rename, not a copy)
     extracted = f'/tmp/node-extract/node-{{NODE_VERSION}}-linux-{{arch}}'
-    subprocess.run(f'cp -r {{extracted}}/* {{NODE_DIR}}/', shell=True, check=True)
-    os.remove('/tmp/node.tar.gz')
+    shutil.rmtree(NODE_DIR, ignore_errors=True)
+    os.rename(extracted, NODE_DIR)
     print(f'Node.js installed')
 else:
     print('Node.js already cached')
@@ -96,47 +124,61 @@ print(f'Version: {{r.stdout.strip()}}')
 """
 
 
-def make_run_code(prompt: str) -> str:
-    """Generate the Python code to run Claude Code with the given prompt."""
-    return f"""
+# --- Runner defined once per session inside the sandbox ---
+# The environment and workspace are prepared once; each prompt afterwards is
+# just a short run_claude(...) call instead of a full script to re-parse.
+RUNNER_CODE = f"""
 import subprocess, os
 
 NODE_DIR = '/tmp/claude-code/node'
 CLAUDE_CLI = f'{{NODE_DIR}}/lib/node_modules/@anthropic-ai/claude-code/cli.js'
 
-env = os.environ.copy()
-env['PATH'] = f'{{NODE_DIR}}/bin:' + env.get('PATH', '')
-env['HOME'] = '/tmp/claude-home'
-env['CLAUDE_CODE_USE_BEDROCK'] = '1'
-env['ANTHROPIC_MODEL'] = '{MODEL_ID}'
-env['AWS_REGION'] = '{REGION}'
+CLAUDE_ENV = os.environ.copy()
+CLAUDE_ENV['PATH'] = f'{{NODE_DIR}}/bin:' + CLAUDE_ENV.get('PATH', '')
+CLAUDE_ENV['HOME'] = '/tmp/claude-home'
+CLAUDE_ENV['CLAUDE_CODE_USE_BEDROCK'] = '1'
+CLAUDE_ENV['ANTHROPIC_MODEL'] = '{MODEL_ID}'
+CLAUDE_ENV['AWS_REGION'] = '{REGION}'
 
 os.makedirs('/tmp/workspace', exist_ok=True)
 
-result = subprocess.run(
-    [f'{{NODE_DIR}}/bin/node', CLAUDE_CLI,
-     '-p', {repr(prompt)},
-     '--output-format', 'text',
-     '--allowedTools', 'Edit', 'Write', 'Bash(*)'],
-    capture_output=True, text=True,
-    env=env,
-    cwd='/tmp/workspace',
-    timeout=300
-)
 
-if result.stdout:
-    print(result.stdout)
-if result.returncode != 0 and result.stderr:
-    for line in result.stderr.splitlines():
-        if any(skip in line.lower() for skip in [
-            'experimentalwarning', 'deprecated', 'punycode'
-        ]):
-            continue
-        if line.strip():
-            print('STDERR:', line)
+def run_claude(prompt):
+    result = subprocess.run(
+        [f'{{NODE_DIR}}/bin/node', CLAUDE_CLI,
+         '-p', prompt,
+         '--output-format', 'text',
+         '--allowedTools', 'Edit', 'Write', 'Bash(*)'],
+        capture_output=True, text=True,
+        env=CLAUDE_ENV,
+        cwd='/tmp/workspace',
+        timeout=300
+    )
+
+    if result.stdout:
+        print(result.stdout)
+    if result.returncode != 0 and result.stderr:
+        for line in result.stderr.splitlines():
+            if any(skip in line.lower() for skip in [
+                'experimentalwarning', 'deprecated', 'punycode'
+            ]):
+                continue
+            if line.strip():
+                print('STDERR:', line)
 """
 
 
+def make_run_code(prompt: str) -> str:
+    """Generate the Python code to run Claude Code with the given prompt."""
+    return f"run_claude({prompt!r})\n"
+
+
+@lru_cache(maxsize=None)
+def get_agentcore(region: str):
+    """One AgentCore client per region; the setup and run steps share its connections."""
+    return boto3.client("bedrock-agentcore", region_name=region, config=BOTO_CONFIG)
+
+
 def execute_code(agentcore, ci_id: str, session_id: str, code: str) -> str:
     """Run Python code in the sandbox and return output."""
     response = agentcore.invoke_code_interpreter(
@@ -145,56 +187,60 @@ def execute_code(agentcore, ci_id: str, session_id: str, code: str) -> str:
         name="executeCode",
         arguments={"language": "python", "code": code},
     )
-    parts = []
-    for event in response["stream"]:
-        if "result" in event:
-            for item in event["result"].get("content", []):
-                if item["type"] == "text":
-                    parts.append(item["text"])
-    return "\n".join(parts)
+    # Join text chunks straight off the event stream
+    return "\n".join(
+        item["text"]
+        for event in response["stream"]
+        for item in event.get("result", {}).get("content", ())
+        if item.get("type") == "text"
+    )
 
 
 def main():
     if len(sys.argv) < 3:
-        print("Usage: python run.py <code-interpreter-id> \"<prompt>\"")
+        print("Usage: python run.py <code-interpreter-id> \"<prompt>\" [session-id | keep]")
         print('Example: python run.py claudeCodePublic-abc123 "Write hello world"')
         sys.exit(1)
 
     ci_id = sys.argv[1]
     prompt = sys.argv[2]
+    reuse = sys.argv[3] if len(sys.argv) > 3 else None
 
-    agentcore = boto3.client(
-        "bedrock-agentcore", region_name=REGION, config=BOTO_CONFIG
-    )
+    agentcore = get_agentcore(REGION)
 
-    # Start session
-    session = agentcore.start_code_interpreter_session(
-        codeInterpreterIdentifier=ci_id,
-        name="claude_code_session",
-        sessionTimeoutSeconds=1800,
-    )
-    session_id = session["sessionId"]
+    if reuse and reuse != "keep":
+        # Reuse a warm session — skips the session start and the Node.js install
+        session_id = reuse
+    else:
+        session = agentcore.start_code_interpreter_session(
+            codeInterpreterIdentifier=ci_id,
+            name="claude_code_session",
+            sessionTimeoutSeconds=1800,
+        )
+        session_id = session["sessionId"]
     print(f"Session: {session_id}\n")
 
     try:
-        # Install Node.js + Claude Code (cached within session)
-        print("--- Setup ---")
-        setup_output = execute_code(agentcore, ci_id, session_id, INSTALL_CODE)
-        print(setup_output)
-
-        # Run Claude Code
-        print(f"\n--- Claude Code: {prompt} ---")
-        run_output = execute_code(
-            agentcore, ci_id, session_id, make_run_code(prompt)
-        )
-        print(run_output)
+        # Install Node.js + Claude Code (cached within session) and define the
+        # runner, then run Claude Code — sent as one execution so the run starts
+        # the moment setup ends, without another round-trip to AgentCore in between.
+        # A reused session already has both, so only the prompt is sent.
+        header = f"\n--- Claude Code: {prompt} ---"
+        code = f"print({header!r})\n" + make_run_code(prompt)
+        if not reuse or reuse == "keep":
+            print("--- Setup ---")
+            code = INSTALL_CODE + RUNNER_CODE + code
+        print(execute_code(agentcore, ci_id, session_id, code))
 
     finally:
-        agentcore.stop_code_interpreter_session(
-            codeInterpreterIdentifier=ci_id,
-            sessionId=session_id,
-        )
-        print(f"\n--- Session stopped: {session_id} ---")
+        if reuse:
+            print(f"\n--- Session left running: {session_id} ---")
+        else:
+            agentcore.stop_code_interpreter_session(
+                codeInterpreterIdentifier=ci_id,
+                sessionId=session_id,
+            )
+            print(f"\n--- Session stopped: {session_id} ---")
 
 
 if __name__ == "__main__":
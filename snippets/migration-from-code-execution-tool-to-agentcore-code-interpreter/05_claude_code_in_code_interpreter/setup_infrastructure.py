@@ -84,26 +84,34 @@ def create_role(iam) -> str:
 
 def create_code_interpreter(cp_client, role_arn: str) -> str:
     """Create a custom Code Interpreter with PUBLIC network mode."""
-    # Check if it already exists
-    existing = cp_client.list_code_interpreters()
-    for ci in existing.get("codeInterpreters", []):
-        if ci.get("name", "").startswith(CODE_INTERPRETER_NAME):
-            ci_id = ci["codeInterpreterId"]
-            print(f"Code Interpreter already exists: {ci_id}")
-            return ci_id
-
-    # Wait for IAM role propagation
-    print("Waiting 10s for IAM role propagation...")
-    time.sleep(10)
-
-    response = cp_client.create_code_interpreter(
-        name=CODE_INTERPRETER_NAME,
-        description="Code Interpreter with public network for running Claude Code via Bedrock",
-        executionRoleArn=role_arn,
-        networkConfiguration={
-            "networkMode": "PUBLIC"
-        }
-    )
+    # Check if it already exists — walk every page, stopping at the first match
+    paginator = cp_client.get_paginator("list_code_interpreters")
+    for page in paginator.paginate():
+        for ci in page["codeInterpreterSummaries"]:
+            if ci.get("name", "").startswith(CODE_INTERPRETER_NAME):
+                ci_id = ci["codeInterpreterId"]
+                print(f"Code Interpreter already exists: {ci_id}")
+                return ci_id
+
+    # A just-created IAM role can take a few seconds to propagate. Instead of a
+    # fixed wait, try right away and back off only while the role is rejected.
+    for delay in (1, 2, 4, 8, 0):
+        try:
+            response = cp_client.create_code_interpreter(
+                name=CODE_INTERPRETER_NAME,
+                description="Code Interpreter with public network for running Claude Code via Bedrock",
+                executionRoleArn=role_arn,
+                networkConfiguration={
+                    "networkMode": "PUBLIC"
+                }
+            )
+            break
+        except (cp_client.exceptions.AccessDeniedException,
+                cp_client.exceptions.ValidationException):
+            if not delay:
+                raise
+            print(f"Waiting {delay}s for IAM role propagation...")
+            time.sleep(delay)
 
     ci_id = response["codeInterpreterId"]
     print(f"Created Code Interpreter: {ci_id}")
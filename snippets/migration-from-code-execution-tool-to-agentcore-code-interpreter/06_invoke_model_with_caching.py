@@ -149,13 +149,13 @@ def execute_code(code: str, session_id: str) -> str:
         name="executeCode",
         arguments={"language": "python", "code": code}
     )
-    parts = []
-    for event in response["stream"]:
-        if "result" in event:
-            for item in event["result"].get("content", []):
-                if item["type"] == "text":
-                    parts.append(item["text"])
-    return "\n".join(parts)
+    # Join text chunks straight off the event stream
+    return "\n".join(
+        item["text"]
+        for event in response["stream"]
+        for item in event.get("result", {}).get("content", ())
+        if item.get("type") == "text"
+    )
 
 
 def invoke_with_caching(user_message: str, session_id: str) -> dict:
@@ -58,58 +58,114 @@ Usage:
     python 07_programmatic_tool_calling.py
 """
 
+import ast
 import boto3
+import hashlib
+from botocore.config import Config
 import json
+from concurrent.futures import Future, ThreadPoolExecutor
 
 # --- Configuration ---
 REGION = "us-west-2"
 MODEL_ID = "global.anthropic.claude-sonnet-4-6"
 
+# Upper bound on model round-trips per question, so a model that keeps
+# requesting tools can't run up unbounded latency and cost. The last
+# round-trip has tools disabled and must answer in text.
+MAX_ROUND_TRIPS = 8
+FINAL_ANSWER_PROMPT = "Round-trip limit reached. Give your final answer now without running more code."
+
+# Code whose first line is this marker is treated as pure (no side effects on the
+# sandbox session), so its output can be reused
+PURE_MARKER = "# pure"
+
+# Keep-alive connections and a larger pool, so the rapid round-trips of ask()
+# and its sequential tool calls reuse warm TLS connections
+BOTO_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={"mode": "adaptive", "max_attempts": 5},
+    connect_timeout=5,
+    read_timeout=600,
+)
+
 # --- AWS Clients ---
-bedrock = boto3.client("bedrock-runtime", region_name=REGION)
-agentcore = boto3.client("bedrock-agentcore", region_name=REGION)
+bedrock = boto3.client("bedrock-runtime", region_name=REGION, config=BOTO_CONFIG)
+agentcore = boto3.client("bedrock-agentcore", region_name=REGION, config=BOTO_CONFIG)
 
 
 # --- Tool functions to pre-load into the sandbox ---
 # In production, replace these with real API calls, SDK calls, or DB queries.
 TOOL_FUNCTIONS = '''
+from functools import lru_cache
+
+import pandas as pd
+
+# Simulated data — replace with real APIs. One column per field, one row per
+# city, shared by all three tools and by get_all() below.
+CITIES = ["Seattle", "Portland", "San Francisco", "Los Angeles", "Denver"]
+CITY_ROW = {city: row for row, city in enumerate(CITIES)}
+CITY_COLUMNS = {
+    # get_weather
+    "temp_f": [58, 62, 65, 78, 72],
+    "humidity_pct": [82, 75, 70, 45, 30],
+    "condition": ["Cloudy", "Partly Cloudy", "Foggy", "Sunny", "Clear"],
+    "wind_mph": [12, 8, 15, 5, 10],
+    # get_population
+    "population": [749256, 652503, 808437, 3898747, 713252],
+    "metro_population": [4018762, 2512859, 4749008, 13200998, 2963821],
+    "state": ["WA", "OR", "CA", "CA", "CO"],
+    # get_cost_of_living
+    "index": [172, 130, 190, 166, 128],
+    "median_rent_1br": [2100, 1650, 2800, 2400, 1700],
+    "median_home_price": [850000, 550000, 1400000, 950000, 580000],
+}
+CITY_TABLE = pd.DataFrame(CITY_COLUMNS, index=pd.Index(CITIES, name="city"))
+
+
+# Memoized per (city, fields): model code calls the same lookups repeatedly,
+# across code blocks and turns. With real APIs behind the tools, this is what
+# saves the repeat network calls. Results are cached as immutable tuples, and
+# every caller gets its own dict.
+@lru_cache(maxsize=32)
+def _lookup(city: str, fields: tuple, kind: str) -> tuple:
+    row = CITY_ROW.get(city)
+    if row is None:
+        return (("error", f"No {kind} data for {city}"),)
+    return tuple((field, CITY_COLUMNS[field][row]) for field in fields)
+
+
 def get_weather(city: str) -> dict:
     """Get current weather for a city. (Simulated — replace with a real weather API.)"""
-    data = {
-        "Seattle": {"temp_f": 58, "humidity_pct": 82, "condition": "Cloudy", "wind_mph": 12},
-        "Portland": {"temp_f": 62, "humidity_pct": 75, "condition": "Partly Cloudy", "wind_mph": 8},
-        "San Francisco": {"temp_f": 65, "humidity_pct": 70, "condition": "Foggy", "wind_mph": 15},
-        "Los Angeles": {"temp_f": 78, "humidity_pct": 45, "condition": "Sunny", "wind_mph": 5},
-        "Denver": {"temp_f": 72, "humidity_pct": 30, "condition": "Clear", "wind_mph": 10},
-    }
-    return data.get(city, {"error": f"No weather data for {city}"})
+    return dict(_lookup(city, ("temp_f", "humidity_pct", "condition", "wind_mph"), "weather"))
 
 
 def get_population(city: str) -> dict:
     """Get population stats. (Simulated — replace with a census API or database query.)"""
-    data = {
-        "Seattle": {"population": 749256, "metro_population": 4018762, "state": "WA"},
-        "Portland": {"population": 652503, "metro_population": 2512859, "state": "OR"},
-        "San Francisco": {"population": 808437, "metro_population": 4749008, "state": "CA"},
-        "Los Angeles": {"population": 3898747, "metro_population": 13200998, "state": "CA"},
-        "Denver": {"population": 713252, "metro_population": 2963821, "state": "CO"},
-    }
-    return data.get(city, {"error": f"No population data for {city}"})
+    return dict(_lookup(city, ("population", "metro_population", "state"), "population"))
 
 
 def get_cost_of_living(city: str) -> dict:
     """Get cost of living index. (Simulated — replace with a real data source.)"""
-    data = {
-        "Seattle": {"index": 172, "median_rent_1br": 2100, "median_home_price": 850000},
-        "Portland": {"index": 130, "median_rent_1br": 1650, "median_home_price": 550000},
-        "San Francisco": {"index": 190, "median_rent_1br": 2800, "median_home_price": 1400000},
-        "Los Angeles": {"index": 166, "median_rent_1br": 2400, "median_home_price": 950000},
-        "Denver": {"index": 128, "median_rent_1br": 1700, "median_home_price": 580000},
-    }
-    return data.get(city, {"error": f"No cost data for {city}"})
+    return dict(_lookup(city, ("index", "median_rent_1br", "median_home_price"), "cost"))
+
+
+def get_all(cities: list = None) -> pd.DataFrame:
+    """Every field for the given cities (default: all) as one DataFrame, indexed by city."""
+    if cities is None:
+        cities = CITIES
+    elif isinstance(cities, str):
+        cities = [cities]
+    # reindex (unlike .loc) keeps unknown cities as empty rows instead of raising
+    table = CITY_TABLE.reindex(cities)
+    unknown = ~table.index.isin(CITIES)
+    if unknown.any():
+        table["error"] = [f"No data for {city}" if missing else None
+                          for city, missing in zip(table.index, unknown)]
+    return table
 
 
-print("Tools loaded: get_weather(), get_population(), get_cost_of_living()")
+print("Tools loaded: get_weather(), get_population(), get_cost_of_living(), get_all()")
 '''
 
 
@@ -126,12 +182,26 @@ these functions already loaded and ready to call:
 - get_cost_of_living(city: str) -> dict
   Returns: {"index", "median_rent_1br", "median_home_price"}
 
+- get_all(cities: list = None) -> pandas.DataFrame
+  All of the fields above for the given cities (default: all), one row per city,
+  indexed by city. Use it to compare or rank several cities in one vectorized step.
+  Unknown cities get an empty row with an "error" column explaining why.
+
 Available cities: Seattle, Portland, San Francisco, Los Angeles, Denver.
 
 IMPORTANT: When answering questions, write Python code that calls MULTIPLE tools
 in a single code block, processes the results, and prints a clear summary.
 This is more efficient than calling tools one at a time — you reduce round-trips
-and can filter/aggregate data before it reaches your context window."""
+and can filter/aggregate data before it reaches your context window.
+
+For questions about more than one city, always use get_all(cities) — it returns
+one merged row per city in a single call. Do not loop over cities calling the
+per-city functions; filter, sort and rank the DataFrame with column operations
+instead (e.g. df[df["temp_f"] > 65], df.sort_values("index")), and print only
+the final table or summary.
+
+If a code block only reads data and prints (it defines or changes nothing in
+the session), make its first line `# pure` so its output can be reused."""
 
 
 # --- Single tool: execute code in the sandbox ---
@@ -139,7 +209,8 @@ TOOLS = [{
     "name": "execute_python",
     "description": (
         "Execute Python code in the sandbox. Pre-loaded functions available: "
-        "get_weather(city), get_population(city), get_cost_of_living(city). "
+        "get_weather(city), get_population(city), get_cost_of_living(city), "
+        "get_all(cities) for a pandas DataFrame of every field across cities. "
         "Call multiple functions in a single code block for efficiency."
     ),
     "input_schema": {
@@ -151,79 +222,230 @@ TOOLS = [{
             }
         },
         "required": ["code"]
-    }
+    },
+    # Prompt caching: the tool schema is identical on every round-trip
+    "cache_control": {"type": "ephemeral"}
 }]
 
 
-def execute_code(code: str, session_id: str) -> str:
-    """Execute code via AgentCore and return the output."""
+# --- Request fields that are identical on every round-trip ---
+# Serialized once; each turn only encodes its messages (see build_request_body).
+# System prompt and tools never change, so they are also marked for prompt caching.
+REQUEST_HEAD = json.dumps({
+    "anthropic_version": "bedrock-2023-05-31",
+    "max_tokens": 4096,
+    "system": [{
+        "type": "text",
+        "text": SYSTEM_PROMPT,
+        "cache_control": {"type": "ephemeral"}
+    }],
+    "tools": TOOLS,
+})[:-1]  # drop the closing brace so messages can be appended
+
+
+def execute_code_stream(code: str, session_id: str):
+    """Execute code via AgentCore, yielding output text chunks as they arrive."""
     response = agentcore.invoke_code_interpreter(
         codeInterpreterIdentifier="aws.codeinterpreter.v1",
         sessionId=session_id,
         name="executeCode",
         arguments={"language": "python", "code": code}
     )
-    parts = []
     for event in response["stream"]:
-        if "result" in event:
-            for item in event["result"].get("content", []):
-                if item["type"] == "text":
-                    parts.append(item["text"])
-    return "\n".join(parts)
+        for item in event.get("result", {}).get("content", ()):
+            if item.get("type") == "text":
+                yield item["text"]
+
+
+def execute_code(code: str, session_id: str) -> str:
+    """Execute code via AgentCore and return the output."""
+    return "\n".join(execute_code_stream(code, session_id))
+
+
+# Outputs of pure code already run in each session, keyed by a hash of the code.
+# Repeated questions often make Claude regenerate an identical snippet; reusing
+# its output skips a sandbox round-trip. The session keeps state between calls,
+# so only code marked with PURE_MARKER is cached. Scoped per session because
+# sandbox state differs between them.
+tool_cache = {}
+
+
+def is_noop(code: str) -> bool:
+    """True if the code does nothing at all (only `pass` or bare literals).
+
+    Imports are not no-ops here: they bind names in the stateful sandbox
+    session that later code blocks rely on.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return False  # let the sandbox report the error
+    return all(
+        isinstance(node, ast.Pass)
+        or (isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant))
+        for node in tree.body
+    )
+
+
+def run_tool(block: dict, session_id: str, tools_loaded: Future = None) -> dict:
+    """
+    Execute one tool_use block, echoing its output as it streams in. If the
+    tool functions are still being loaded into the sandbox, wait for that first.
+    """
+    if tools_loaded is not None:
+        tools_loaded.result()
+    code = block["input"]["code"]
+    if is_noop(code):
+        # Nothing to run — skip the sandbox round-trip
+        return {
+            "type": "tool_result",
+            "tool_use_id": block["id"],
+            "content": [{"type": "text", "text": "(no output)"}],
+        }
+
+    pure = code.lstrip().startswith(PURE_MARKER)
+    if pure:
+        session_cache = tool_cache.setdefault(session_id, {})
+        key = hashlib.sha256(code.encode()).hexdigest()
+        if key in session_cache:
+            print("  [Tool cache hit]")
+            return {
+                "type": "tool_result",
+                "tool_use_id": block["id"],
+                "content": [{
+                    "type": "text",
+                    "text": f"(cached: this code was not re-run)\n{session_cache[key]}",
+                }],
+            }
+        print("  [Tool cache miss]")
+
+    print(f"  [Executing code block...]")
+    chunks = []
+    for chunk in execute_code_stream(code, session_id):
+        print(f"  [Output: {chunk[:150]}...]")
+        chunks.append(chunk)
+    output = "\n".join(chunks)
+    if pure:
+        session_cache[key] = output
+    return {
+        "type": "tool_result",
+        "tool_use_id": block["id"],
+        "content": [{"type": "text", "text": output}],
+    }
+
+
+def build_request_body(messages: list, tool_choice: dict = None) -> str:
+    """InvokeModel JSON body: the pre-serialized constant fields plus this turn's messages."""
+    body = f'{REQUEST_HEAD}, "messages": {json.dumps(with_cache_control(messages))}'
+    if tool_choice:
+        body += f', "tool_choice": {json.dumps(tool_choice)}'
+    return body + "}"
+
 
+def stream_turn(request_body: str, session_id: str, pool: ThreadPoolExecutor,
+                tools_loaded: Future = None):
+    """
+    Stream one Claude turn via InvokeModelWithResponseStream. Each tool_use block
+    is submitted to the pool as soon as its input has fully streamed in, so tool
+    calls run while the rest of the turn is still streaming.
 
-def ask(user_message: str, session_id: str) -> dict:
+    Returns the assembled content blocks, the stop reason, and the tool futures.
+    """
+    response = bedrock.invoke_model_with_response_stream(
+        modelId=MODEL_ID,
+        body=request_body,
+        contentType="application/json",
+        accept="application/json",
+    )
+
+    blocks = {}  # content block index -> block being assembled
+    futures = []
+    stop_reason = None
+    for event in response["body"]:
+        chunk = json.loads(event["chunk"]["bytes"])
+        if chunk["type"] == "content_block_start":
+            block = dict(chunk["content_block"])
+            if block["type"] == "tool_use":
+                block["input"] = ""
+            blocks[chunk["index"]] = block
+        elif chunk["type"] == "content_block_delta":
+            block, delta = blocks[chunk["index"]], chunk["delta"]
+            if delta["type"] == "text_delta":
+                block["text"] += delta["text"]
+            elif delta["type"] == "input_json_delta":
+                block["input"] += delta["partial_json"]
+        elif chunk["type"] == "content_block_stop":
+            block = blocks[chunk["index"]]
+            if block["type"] == "tool_use":
+                # Tool input arrives as JSON fragments; parse once the block is complete
+                block["input"] = json.loads(block["input"] or "{}")
+                if pool is not None:
+                    futures.append(pool.submit(run_tool, block, session_id, tools_loaded))
+        elif chunk["type"] == "message_delta":
+            stop_reason = chunk["delta"].get("stop_reason")
+
+    return [blocks[i] for i in sorted(blocks)], stop_reason, futures
+
+
+def with_cache_control(messages: list) -> list:
+    """
+    Copy of the conversation with a cache breakpoint on the newest content block,
+    so the next round-trip reads the prior conversation from the prompt cache.
+    Only the newest block is marked (at most 4 breakpoints per request).
+    """
+    last = messages[-1]
+    content = last["content"][:-1] + [
+        {**last["content"][-1], "cache_control": {"type": "ephemeral"}}
+    ]
+    return messages[:-1] + [{**last, "content": content}]
+
+
+def ask(user_message: str, session_id: str, tools_loaded: Future = None,
+        max_round_trips: int = MAX_ROUND_TRIPS) -> dict:
     """
     Send a message to Claude. The model writes code that calls pre-loaded
     tools programmatically — multiple tools in a single execution.
 
+    tools_loaded is an optional future for the pre-load of TOOL_FUNCTIONS, so
+    the first model call can start while the tools are still being loaded.
+
+    The last of max_round_trips is made with tools disabled, so the model has
+    to answer, which bounds the worst-case latency of a single question.
+
     Returns the final answer and the number of model round-trips.
     """
     messages = [{"role": "user", "content": [{"type": "text", "text": user_message}]}]
     round_trips = 0
 
-    while True:
-        round_trips += 1
-
-        request_body = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 4096,
-            "system": [{"type": "text", "text": SYSTEM_PROMPT}],
-            "messages": messages,
-            "tools": TOOLS,
-        }
-
-        response = bedrock.invoke_model(
-            modelId=MODEL_ID,
-            body=json.dumps(request_body),
-            contentType="application/json",
-            accept="application/json",
-        )
-
-        result = json.loads(response["body"].read())
-        messages.append({"role": "assistant", "content": result["content"]})
-
-        # Done — no more tool calls
-        if result["stop_reason"] != "tool_use":
-            answer = "\n".join(
-                b["text"] for b in result["content"] if b["type"] == "text"
+    # One worker: the sandbox session is stateful and handles one call at a time,
+    # so tool_use blocks run in the order Claude issued them (a later block may use
+    # names an earlier one defined), while still overlapping with streaming.
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        while True:
+            round_trips += 1
+
+            # Last allowed round-trip: ask for the answer with tools disabled
+            final = round_trips >= max_round_trips
+            if final and len(messages) > 1:
+                messages[-1]["content"].append({"type": "text", "text": FINAL_ANSWER_PROMPT})
+
+            # Stream the reply; tool calls start as soon as each one has streamed in
+            content, stop_reason, pending = stream_turn(
+                build_request_body(messages, {"type": "none"} if final else None),
+                session_id, None if final else pool, tools_loaded
             )
-            return {"answer": answer, "round_trips": round_trips}
+            messages.append({"role": "assistant", "content": content})
 
-        # Execute tool calls
-        tool_results = []
-        for block in result["content"]:
-            if block["type"] == "tool_use":
-                print(f"  [Executing code block...]")
-                output = execute_code(block["input"]["code"], session_id)
-                print(f"  [Output: {output[:150]}...]")
-                tool_results.append({
-                    "type": "tool_result",
-                    "tool_use_id": block["id"],
-                    "content": [{"type": "text", "text": output}],
-                })
+            # Done — no more tool calls
+            if stop_reason != "tool_use" or final:
+                answer = "\n".join(
+                    b["text"] for b in content if b["type"] == "text"
+                )
+                return {"answer": answer, "round_trips": round_trips}
 
-        messages.append({"role": "user", "content": tool_results})
+            # Collect tool results in the order Claude issued the calls
+            tool_results = [future.result() for future in pending]
+            messages.append({"role": "user", "content": tool_results})
 
 
 def main():
@@ -239,9 +461,15 @@ def main():
     try:
         # Step 1: Pre-load tool functions into the sandbox
         # The session persists state — functions stay available for all subsequent calls.
+        # Loading runs in the background while Claude processes the first prompt;
+        # tool calls wait for it to finish before they execute.
         print("--- Loading tools into sandbox ---")
-        output = execute_code(TOOL_FUNCTIONS, session_id)
-        print(output)
+        loader = ThreadPoolExecutor(max_workers=1)
+        tools_loaded = loader.submit(execute_code, TOOL_FUNCTIONS, session_id)
+        tools_loaded.add_done_callback(
+            lambda f: print(f.result() if not f.exception() else f.exception())
+        )
+        loader.shutdown(wait=False)
 
         # Step 2: Ask a question that requires MULTIPLE tools
         #
@@ -264,7 +492,7 @@ def main():
         )
         print(f"\n--- Query ---\n{query}\n")
 
-        result = ask(query, session_id)
+        result = ask(query, session_id, tools_loaded)
 
         print(f"\n--- Answer ---\n{result['answer']}")
         print(f"\n--- Efficiency ---")
@@ -273,6 +501,7 @@ def main():
         print(f"Programmatic approach: model calls all tools in code, processes results, returns summary")
 
     finally:
+        tool_cache.pop(session_id, None)
         agentcore.stop_code_interpreter_session(
             codeInterpreterIdentifier="aws.codeinterpreter.v1",
             sessionId=session_id,